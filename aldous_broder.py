@@ -1,16 +1,18 @@
-import random
+from rng import resolve
 
 class AldousBroder:
 
     @staticmethod
-    def apply(grid):
+    def apply(grid, rng=None):
+
+        rng = resolve(rng)
 
         # Inizializza un set con tutte le celle della griglia.
         # Questo ci permette di controllare in O(1) se una cella è già stata visitata.
         unvisited = set(grid.each_cell())
 
         # Scegli una cella casuale come punto di partenza.
-        cell = grid.random_cell()
+        cell = grid.random_cell(rng)
 
         # La cella di partenza è considerata "visitata" e fa parte del labirinto.
         unvisited.remove(cell)
@@ -19,7 +21,7 @@ class AldousBroder:
         while unvisited:  # La condizione diventa semplicemente se il set non è vuoto
 
             # Scelgo una cella adiacente casuale alla cella corrente
-            neighbor_cell = random.choice(cell.all_neighbors())
+            neighbor_cell = rng.choice(cell.all_neighbors())
 
             # Se la cella adiacente è ancora nel set delle "non visitate"
             # significa che la stiamo visitando per la prima volta con questa passeggiata.
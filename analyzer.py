@@ -1,24 +1,35 @@
 import sys
 import time
+import tracemalloc
 
 from astar import AStar
+from bidirectional import BidirectionalBFS, BidirectionalAStar
+from tree_oracle import TreePathOracle
 from grid import Grid
+from packed_grid import PackedGrid
 from binary_tree import BinaryTree
 from recursive_division import RecursiveDivision
 from sidewinder import Sidewinder
 from aldous_broder import AldousBroder
 from recursive_backtracker import RecursiveBacktracker
+from wilson import Wilson
+from kruskal import Kruskal
+from rng import resolve, spawn_seeds
 
 
 # Calcola tempo di esecuzione per ogni algoritmo generativo
 def execution_time_generation(rows=100, columns=100, tries=100,
-                              algorithms=None, show_every_try=False):
+                              algorithms=None, show_every_try=False, grid_class=Grid, seed=None):
 
     print("-----CALCOLO ALGORITMI GENERATIVI-----")
 
     if algorithms is None:
         algorithms = [BinaryTree, Sidewinder, RecursiveBacktracker, AldousBroder, RecursiveDivision]
 
+    # Un seed indipendente per ogni tentativo, derivato dal seed principale:
+    # ogni tentativo è riproducibile anche da solo (None = modulo random globale)
+    seeds = spawn_seeds(seed, tries) if seed is not None else [None] * tries
+
     averages = {}
 
     # ------------------------------------- #
@@ -29,9 +40,10 @@ def execution_time_generation(rows=100, columns=100, tries=100,
 
         # ------------------------------------- #
         for i in range(tries):
-            testgrid = Grid(rows, columns)
+            try_rng = resolve(seeds[i])
+            testgrid = grid_class(rows, columns)
             start_time = time.perf_counter()
-            algo.apply(testgrid)
+            algo.apply(testgrid, rng=try_rng)
             end_time = time.perf_counter()
 
             if show_every_try:
@@ -62,13 +74,18 @@ def execution_time_generation(rows=100, columns=100, tries=100,
 
 # Calcola tempo di esecuzione per l'algoritmo A* applicato ad ogni algoritmo generativo
 def execution_time_resolution(rows=100, columns=100, tries=100,
-                              maze_solvers=None, maze_generator=BinaryTree, show_every_try=False):
+                              maze_solvers=None, maze_generator=BinaryTree, show_every_try=False,
+                              grid_class=Grid, seed=None):
 
     print("-----CALCOLO ALGORITMO RISOLUTIVO-----")
 
     if maze_solvers is None:
         maze_solvers = [AStar]
 
+    # Un seed indipendente per ogni tentativo, derivato dal seed principale:
+    # ogni tentativo è riproducibile anche da solo (None = modulo random globale)
+    seeds = spawn_seeds(seed, tries) if seed is not None else [None] * tries
+
     performance_metrics = {}
 
     # ------------------------------------- #
@@ -77,14 +94,16 @@ def execution_time_resolution(rows=100, columns=100, tries=100,
         print(f"\nAnalisi {algo.__name__} per {maze_generator.__name__}")
         execution_times = []
         path_lengths = []
+        expanded_nodes = []
 
         # ------------------------------------- #
         for i in range(tries):
 
-            testgrid = Grid(rows, columns)
-            maze_generator.apply(testgrid)
-            start_cell = testgrid.random_cell()
-            end_cell = testgrid.random_cell()
+            try_rng = resolve(seeds[i])
+            testgrid = grid_class(rows, columns)
+            maze_generator.apply(testgrid, rng=try_rng)
+            start_cell = testgrid.random_cell(try_rng)
+            end_cell = testgrid.random_cell(try_rng)
 
             solve_start_time = time.perf_counter()
             solution_path = algo.apply(testgrid, start_cell, end_cell)
@@ -96,6 +115,11 @@ def execution_time_resolution(rows=100, columns=100, tries=100,
             path_len = len(solution_path)
             path_lengths.append(path_len)
 
+            # Celle espanse dal risolutore (solo se le conta)
+            expanded = getattr(algo, "expanded", None)
+            if expanded is not None:
+                expanded_nodes.append(expanded)
+
             if show_every_try:
                 if exec_time >= 60:
                     print(f"  Try {i + 1}: [ {exec_time / 60:.3f}m | {exec_time:.3f}s | {(exec_time * 1000):.3f}ms ] | Lunghezza soluzione: {solution_path.__len__()}")
@@ -111,9 +135,14 @@ def execution_time_resolution(rows=100, columns=100, tries=100,
         if path_lengths:
             avg_length = sum(path_lengths) / len(path_lengths)
 
+        avg_expanded = None
+        if expanded_nodes:
+            avg_expanded = sum(expanded_nodes) / len(expanded_nodes)
+
         performance_metrics[algo.__name__] = {
             "average_time": avg_time,
-            "average_length": avg_length
+            "average_length": avg_length,
+            "average_expanded": avg_expanded
         }
     # ------------------------------------- #
 
@@ -124,9 +153,12 @@ def execution_time_resolution(rows=100, columns=100, tries=100,
         metrics = performance_metrics.get(algo.__name__)
         metric_time = metrics["average_time"]
         metric_path = metrics["average_length"]
+        metric_expanded = metrics["average_expanded"]
         print(f"{algo.__name__}: \n\t"
               f"[ {metric_time / 60:.3f}m | {metric_time:.3f}s | {(metric_time * 1000):.3f}ms ] \n\t"
               f"Lunghezza media soluzione: {metric_path} \n")
+        if metric_expanded is not None:
+            print(f"\tNodi espansi medi: {metric_expanded:.1f} \n")
     # ------------------------------------- #
 
     print("\n")
@@ -136,13 +168,17 @@ def execution_time_resolution(rows=100, columns=100, tries=100,
 
 # Calcola la lunghezza del cammino più lungo per ogni algoritmo generativo
 def longest_path_length(rows=100, columns=100, tries=100,
-                        algorithms=None, show_every_try=False):
+                        algorithms=None, show_every_try=False, grid_class=Grid, seed=None):
 
     print("-----CALCOLO PERCORSO PIU' LUNGO-----")
 
     if algorithms is None:
         algorithms = [BinaryTree, Sidewinder, RecursiveBacktracker, AldousBroder, RecursiveDivision]
 
+    # Un seed indipendente per ogni tentativo, derivato dal seed principale:
+    # ogni tentativo è riproducibile anche da solo (None = modulo random globale)
+    seeds = spawn_seeds(seed, tries) if seed is not None else [None] * tries
+
     performance_metrics = {}
 
     # ------------------------------------- #
@@ -155,21 +191,11 @@ def longest_path_length(rows=100, columns=100, tries=100,
         # ------------------------------------- #
         for i in range(tries):
 
-            testgrid = Grid(rows, columns)
-            algo.apply(testgrid)
-            root = testgrid[0,0]
-
-            # Calcola tutte le distanze dalla root
-            maze_distances = root.calc_all_distances()
-
-            # Calcolo percorso più lungo dalla radice
+            testgrid = grid_class(rows, columns)
+            algo.apply(testgrid, rng=resolve(seeds[i]))
+            # Calcolo percorso più lungo (diametro) con una sola visita
             start_time = time.perf_counter()
-
-            longest_path_root, _ = maze_distances.longest_path_from()
-            distances_from_longest_path_root = longest_path_root.calc_all_distances()
-
-            # Calcolo percorso più lungo dalla nuova radice
-            longest_path_goal, max_dist_longest_path = distances_from_longest_path_root.longest_path_from()
+            _, _, max_dist_longest_path, _, _ = testgrid.diameter()
             end_time = time.perf_counter()
 
             exec_time = end_time - start_time
@@ -217,13 +243,17 @@ def longest_path_length(rows=100, columns=100, tries=100,
 
 
 # Calcola media vicoli ciechi per ogni algoritmo generativo
-def count_deadends(rows=100, columns=100, tries=100, algorithms=None):
+def count_deadends(rows=100, columns=100, tries=100, algorithms=None, grid_class=Grid, seed=None):
 
     print("-----CALCOLO VICOLI CIECHI-----")
 
     if algorithms is None:
         algorithms = [BinaryTree, Sidewinder, RecursiveBacktracker, AldousBroder, RecursiveDivision]
 
+    # Un seed indipendente per ogni tentativo, derivato dal seed principale:
+    # ogni tentativo è riproducibile anche da solo (None = modulo random globale)
+    seeds = spawn_seeds(seed, tries) if seed is not None else [None] * tries
+
     averages = {}
 
     # ------------------------------------- #
@@ -235,8 +265,8 @@ def count_deadends(rows=100, columns=100, tries=100, algorithms=None):
         # ------------------------------------- #
         for i in range(tries):
             print(f"Try {i}: ")
-            testgrid = Grid(rows, columns)
-            algo.apply(testgrid)
+            testgrid = grid_class(rows, columns)
+            algo.apply(testgrid, rng=resolve(seeds[i]))
             count_deadends.append(len(testgrid.deadends()))
         # ------------------------------------- #
 
@@ -257,6 +287,107 @@ def count_deadends(rows=100, columns=100, tries=100, algorithms=None):
 
 
 
+# Calcola la memoria occupata per cella e la velocità della BFS (celle visitate al secondo)
+def memory_and_bfs_throughput(rows=300, columns=300, tries=10,
+                              grid_classes=None, maze_generator=RecursiveBacktracker):
+
+    print("-----CALCOLO MEMORIA E BFS-----")
+
+    if grid_classes is None:
+        grid_classes = [Grid, PackedGrid]
+
+    # ------------------------------------- #
+    for grid_class in grid_classes:
+
+        # Memoria allocata dalla sola costruzione della griglia
+        tracemalloc.start()
+        testgrid = grid_class(rows, columns)
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        maze_generator.apply(testgrid)
+        root = testgrid[0, 0]
+
+        execution_times = []
+        array_execution_times = []
+        # ------------------------------------- #
+        for i in range(tries):
+            start_time = time.perf_counter()
+            root.calc_all_distances()
+            end_time = time.perf_counter()
+            execution_times.append(end_time - start_time)
+
+            # BFS sugli indici (ArrayDistances)
+            start_time = time.perf_counter()
+            testgrid.calc_distances(root)
+            end_time = time.perf_counter()
+            array_execution_times.append(end_time - start_time)
+        # ------------------------------------- #
+
+        best_time = min(execution_times)
+        best_array_time = min(array_execution_times)
+        print(f"{grid_class.__name__} ({rows}x{columns}): \n\t"
+              f"Memoria per cella: {allocated / testgrid.size():.1f} byte \n\t"
+              f"BFS: [ {best_time:.3f}s | {best_time * 1000:.3f}ms ] | {testgrid.size() / best_time:.0f} celle/s \n\t"
+              f"BFS su array: [ {best_array_time:.3f}s | {best_array_time * 1000:.3f}ms ] | {testgrid.size() / best_array_time:.0f} celle/s \n")
+    # ------------------------------------- #
+
+    print("\n")
+# ---------------------------------------------------------------------------- #
+
+
+
+# Calcola quante richieste al secondo vengono risolte sullo stesso labirinto:
+# una chiamata AStar.apply per ogni coppia, AStar.apply_many (coppie raggruppate per partenza,
+# eventualmente su workers processi) e TreePathOracle (costruzione compresa).
+# Le coppie usano solamente sources partenze diverse, come nei carichi reali.
+def batch_resolution_throughput(rows=300, columns=300, queries=200, sources=10,
+                                maze_generator=RecursiveBacktracker, grid_class=Grid, workers=None, seed=None):
+
+    print("-----CALCOLO RICHIESTE MULTIPLE-----")
+
+    rng = resolve(seed)
+    testgrid = grid_class(rows, columns)
+    maze_generator.apply(testgrid, rng=rng)
+
+    roots = [testgrid.random_cell(rng) for _ in range(sources)]
+    pairs = [(roots[i % sources], testgrid.random_cell(rng)) for i in range(queries)]
+
+    # Ogni risolutore viene misurato consumando tutti i risultati
+    def solve_single():
+        for root, goal_cell in pairs:
+            AStar.apply(testgrid, root, goal_cell)
+
+    def solve_many():
+        for _ in AStar.apply_many(testgrid, pairs, workers=workers):
+            pass
+
+    def solve_oracle():
+        oracle = TreePathOracle(testgrid)
+        for root, goal_cell in pairs:
+            oracle.path(root, goal_cell)
+
+    solvers = [("AStar.apply", solve_single),
+               ("AStar.apply_many", solve_many),
+               ("TreePathOracle", solve_oracle)]
+
+    # ------------------------------------- #
+    for name, solve in solvers:
+
+        start_time = time.perf_counter()
+        solve()
+        end_time = time.perf_counter()
+
+        execution_time = end_time - start_time
+        print(f"{name} ({rows}x{columns}, {queries} richieste, {sources} partenze): \n\t"
+              f"[ {execution_time:.3f}s | {(execution_time * 1000):.3f}ms ] | {queries / execution_time:.1f} richieste/s \n")
+    # ------------------------------------- #
+
+    print("\n")
+# ---------------------------------------------------------------------------- #
+
+
+
 # Scrivi le metriche su un file
 def write_on_file(filepath, rows=100, cols=100, tries=100, show_every_try=False):
 
@@ -276,13 +407,17 @@ def write_on_file(filepath, rows=100, cols=100, tries=100, show_every_try=False)
 
 
 # Analizza tutte le metriche per ogni tentativo
-def full_analysis(rows=100, columns=100, tries=100, algorithms=None, show_every_try=False):
+def full_analysis(rows=100, columns=100, tries=100, algorithms=None, show_every_try=False, grid_class=Grid, seed=None):
 
     print(f"----- ANALISI COMPLETA -----")
 
     if algorithms is None:
         algorithms = [BinaryTree, Sidewinder, RecursiveBacktracker, AldousBroder, RecursiveDivision]
 
+    # Un seed indipendente per ogni tentativo, derivato dal seed principale:
+    # ogni tentativo è riproducibile anche da solo (None = modulo random globale)
+    seeds = spawn_seeds(seed, tries) if seed is not None else [None] * tries
+
     metrics = {
         algo.__name__: {
             "generative_time": [],
@@ -305,11 +440,12 @@ def full_analysis(rows=100, columns=100, tries=100, algorithms=None, show_every_
             if show_every_try:
                 print(f"Try {i + 1}: ")
 
-            testgrid = Grid(rows, columns)
+            try_rng = resolve(seeds[i])
+            testgrid = grid_class(rows, columns)
 
             # Tempo di esecuzione algoritmo generativo
             start_time = time.perf_counter()
-            algo.apply(testgrid)
+            algo.apply(testgrid, rng=try_rng)
             end_time = time.perf_counter()
             metrics[algo.__name__]["generative_time"].append(end_time - start_time)
 
@@ -318,18 +454,13 @@ def full_analysis(rows=100, columns=100, tries=100, algorithms=None, show_every_
             metrics[algo.__name__]["deadends"].append(dead_ends)
 
             # Percorso più lungo
-            root = testgrid[0,0]
-            distances = root.calc_all_distances()
-
-            new_root, _ = distances.longest_path_from()
-            new_distances = new_root.calc_all_distances()
-            _, longest_path = new_distances.longest_path_from()
+            _, _, longest_path, _, _ = testgrid.diameter()
 
             metrics[algo.__name__]["longest_path_length"].append(longest_path)
 
             # Tempo di esecuzione algoritmo risolutivo A*
-            start_cell = testgrid.random_cell()
-            end_cell = testgrid.random_cell()
+            start_cell = testgrid.random_cell(try_rng)
+            end_cell = testgrid.random_cell(try_rng)
 
             start_time = time.perf_counter()
             solution_path = AStar.apply(testgrid, start_cell, end_cell)
@@ -384,16 +515,35 @@ if __name__ == "__main__":
     #algos = [BinaryTree, Sidewinder, AldousBroder, RecursiveBacktracker, RecursiveDivision]
     #full_analysis(rows, columns, tries, algos, show_every_try=True)
 
+    # Griglia compatta (un byte per cella) per i labirinti più grandi
+    #full_analysis(rows, columns, tries, algos, show_every_try=True, grid_class=PackedGrid)
+
+    #memory_and_bfs_throughput(300, 300, 10)
+
+    # Molte richieste sullo stesso labirinto (anche su più processi)
+    #batch_resolution_throughput(300, 300, 200, sources=10, workers=4, seed=2025)
+
     #count_deadends(rows, columns, tries)
     #longest_path_length(rows, columns, tries, show_every_try=True)
 
     #gen = [BinaryTree, Sidewinder, AldousBroder, RecursiveBacktracker, RecursiveDivision]
     #execution_time_generation(rows, columns, tries, gen, show_every_try=True)
 
+    # Con un seed principale ogni esecuzione (anche divisa tra più processi) è riproducibile
+    #full_analysis(rows, columns, tries, algos, show_every_try=True, seed=2025)
+
+    # Labirinti uniformi: Wilson genera la stessa distribuzione di Aldous-Broder in molto meno tempo
+    #execution_time_generation(rows, columns, tries, [AldousBroder, Wilson], show_every_try=True)
+    #execution_time_generation(rows, columns, tries, [RecursiveBacktracker, Kruskal], show_every_try=True)
+
     #execution_time_resolution(rows, columns, tries, maze_generator=BinaryTree, show_every_try=True)
     #execution_time_resolution(rows, columns, tries, maze_generator=Sidewinder, show_every_try=True)
     #execution_time_resolution(rows, columns, tries, maze_generator=RecursiveBacktracker, show_every_try=True)
     #execution_time_resolution(rows, columns, tries, maze_generator=RecursiveDivision, show_every_try=True)
     #execution_time_resolution(rows, columns, tries, maze_generator=AldousBroder, show_every_try=True)
 
+    # Confronto tra A* e le ricerche bidirezionali (tempo e nodi espansi)
+    #execution_time_resolution(rows, columns, tries, maze_solvers=[AStar, BidirectionalBFS, BidirectionalAStar],
+    #                          maze_generator=RecursiveBacktracker, show_every_try=True)
+
     write_on_file("analysis_results.txt", rows, columns, tries, show_every_try=False)
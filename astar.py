@@ -1,8 +1,33 @@
 import heapq  # coda di priorità (min-heap)
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from packed_grid import PackedGrid
+
+
+# Griglia ricostruita una sola volta in ogni processo worker di apply_many
+_worker_grid = None
+
+
+# Inizializzatore dei worker: ricostruisce il labirinto dai bit di passaggio
+def _init_worker(rows, columns, walls):
+
+    global _worker_grid
+
+    _worker_grid = PackedGrid(rows, columns)
+    _worker_grid._load_walls(walls)
+# ----------------------------------------------- #
+
+
+# Risolve nel worker un gruppo di richieste con la stessa partenza
+def _solve_group(source, goals):
+    return source, goals, AStar._index_paths(_worker_grid, source, goals)
+# ----------------------------------------------- #
 
 
 class AStar:
 
+    # Numero di celle estratte dalla coda durante l'ultima chiamata di apply
+    expanded = 0
 
     @staticmethod
     def _manhattan_distance(cell1, cell2):
@@ -28,15 +53,12 @@ class AStar:
         path = {}
 
         # g_score è il costo del percorso dalla cella di partenza alla cella corrente.
-        # Inizializziamo tutti i costi a infinito.
-        g_score = {cell: float('inf') for cell in grid.each_cell()}
-        g_score[root] = 0 # costo per raggiungere la partenza da sé stessa è 0.
-
-        # f_score è il costo totale stimato f(n) = g(n) + h(n)
-        # Inizializziamo tutti i costi a infinito.
-        f_score = {cell: float('inf') for cell in grid.each_cell()}
-        f_score[root] = AStar._manhattan_distance(root, goal_cell)
-
+        # Contiene solamente le celle già raggiunte: le altre hanno costo infinito
+        # (vedi g_score.get), così la memoria dipende dalla regione esplorata
+        # e non dalla grandezza della griglia.
+        g_score = {root: 0} # costo per raggiungere la partenza da sé stessa è 0.
+        infinity = float('inf')
+        expanded = 0
 
         # Finché ci sono celle da esplorare
         while open_set:
@@ -45,6 +67,7 @@ class AStar:
             # Con tie-breaker, se due cell hanno lo stesso f_score, viene estratta quella inserita prima.
             # (Il contatore viene ignorato usando '_' perché serve solo per l'ordinamento nell'heap)
             current_f_score, _, current_cell = heapq.heappop(open_set)
+            expanded += 1
 
             # Se la cella attuale è la cella obiettivo, abbiamo trovato il percorso
             if current_cell == goal_cell:
@@ -58,6 +81,7 @@ class AStar:
                     temp = path[temp]
 
                 solution_path.append(root)
+                AStar.expanded = expanded
                 return solution_path[::-1] # inverto il percorso
 
             # Se la cella attuale non è la cella obiettivo,
@@ -71,17 +95,101 @@ class AStar:
 
                 # Se questo percorso per la cella adiacente è più corto
                 # di quello precedente
-                if current_g_score < g_score[neighbor]:
+                if current_g_score < g_score.get(neighbor, infinity):
 
                     # Aggiorno scores della cella adiacente
                     path[neighbor] = current_cell
                     g_score[neighbor] = current_g_score
-                    f_score[neighbor] = g_score[neighbor] + AStar._manhattan_distance(neighbor, goal_cell)
+
+                    # f_score è il costo totale stimato f(n) = g(n) + h(n):
+                    # serve solo come priorità nell'heap, non serve salvarlo.
+                    neighbor_f_score = current_g_score + AStar._manhattan_distance(neighbor, goal_cell)
 
                     # Aggiungiamo la cella adiacente alla coda di priorità per esaminarla,
                     # usando il nuovo f_score e il contatore come tie-breaker.
-                    heapq.heappush(open_set, (f_score[neighbor], tie_breaker_counter, neighbor))
+                    heapq.heappush(open_set, (neighbor_f_score, tie_breaker_counter, neighbor))
                     tie_breaker_counter += 1  # Incrementa il contatore dopo ogni push
 
         # Se il ciclo finisce e non abbiamo raggiunto la goal cell, non esiste il percorso
+        AStar.expanded = expanded
         return []
+    # ----------------------------------------------- #
+
+
+    # Cammini minimi (come liste di indici) dall'indice source verso ogni indice di goals.
+    # Una sola BFS per livelli serve tutte le destinazioni della stessa partenza
+    # e si ferma appena le ha raggiunte tutte. Le destinazioni non raggiungibili
+    # hanno cammino vuoto.
+    @staticmethod
+    def _index_paths(grid, source, goals):
+
+        parent = {source: source}
+        remaining = set(goals) - {source}
+        frontier = [source]
+
+        while frontier and remaining:
+
+            next_frontier = []
+
+            for index in frontier:
+                for linked in grid._linked_indices(index):
+                    if linked not in parent:
+                        parent[linked] = index
+                        next_frontier.append(linked)
+                        remaining.discard(linked)
+
+            frontier = next_frontier
+
+        paths = []
+
+        for goal in goals:
+
+            if goal not in parent:
+                paths.append([])
+                continue
+
+            index_path = [goal]
+            while index_path[-1] != source:
+                index_path.append(parent[index_path[-1]])
+
+            paths.append(index_path[::-1])
+
+        return paths
+    # ----------------------------------------------- #
+
+
+    # Risolve molte coppie (root, goal_cell) sullo stesso labirinto.
+    # Le coppie vengono raggruppate per partenza: ogni gruppo costa una sola ricerca.
+    # I risultati vengono restituiti uno alla volta (generatore) come
+    # tuple (root, goal_cell, percorso), nell'ordine in cui i gruppi vengono risolti.
+    # Con workers i gruppi sono distribuiti su più processi: ogni worker ricostruisce
+    # il labirinto una sola volta dai bit di passaggio (vedi _init_worker).
+    @staticmethod
+    def apply_many(grid, pairs, workers=None):
+
+        columns = grid.columns
+        groups = {}
+
+        for root, goal_cell in pairs:
+            source = root.row * columns + root.column
+            groups.setdefault(source, []).append(goal_cell.row * columns + goal_cell.column)
+
+        cell_at = grid._cell
+
+        if not workers:
+            for source, goals in groups.items():
+                root = cell_at(source)
+                for goal, index_path in zip(goals, AStar._index_paths(grid, source, goals)):
+                    yield root, cell_at(goal), [cell_at(index) for index in index_path]
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(grid.rows, columns, grid._dump_walls())) as executor:
+
+            futures = [executor.submit(_solve_group, source, goals) for source, goals in groups.items()]
+
+            for future in as_completed(futures):
+                source, goals, index_paths = future.result()
+                root = cell_at(source)
+                for goal, index_path in zip(goals, index_paths):
+                    yield root, cell_at(goal), [cell_at(index) for index in index_path]
@@ -0,0 +1,166 @@
+import heapq  # coda di priorità (min-heap)
+
+from astar import AStar
+
+
+# Ricostruisce il percorso root -> goal_cell passando per la cella meet,
+# dati i predecessori della ricerca in avanti (verso root)
+# e quelli della ricerca all'indietro (verso goal_cell).
+def _join_paths(meet, parents_forward, parents_backward):
+
+    solution_path = []
+
+    cell = meet
+    while cell is not None:
+        solution_path.append(cell)
+        cell = parents_forward[cell]
+
+    solution_path.reverse()
+
+    cell = parents_backward[meet]
+    while cell is not None:
+        solution_path.append(cell)
+        cell = parents_backward[cell]
+
+    return solution_path
+# ----------------------------------------------- #
+
+
+
+# BFS bidirezionale.
+# Due BFS partono una da root e una da goal_cell; ad ogni passo viene espanso
+# un intero livello della frontiera più piccola. Appena le due ricerche si incontrano
+# il percorso minimo passa per la cella d'incontro con distanza totale minore.
+# In un labirinto le due frontiere restano piccole, quindi vengono espanse
+# molte meno celle che con una BFS (o un A*) da un solo lato.
+class BidirectionalBFS:
+
+    # Numero di celle espanse durante l'ultima chiamata di apply
+    expanded = 0
+
+    @staticmethod
+    def apply(grid, root, goal_cell):
+
+        # Predecessore e distanza di ogni cella raggiunta, per ognuna delle due ricerche
+        parents = ({root: None}, {goal_cell: None})
+        distances = ({root: 0}, {goal_cell: 0})
+        frontiers = ([root], [goal_cell])
+        expanded = 0
+
+        if root == goal_cell:
+            BidirectionalBFS.expanded = 0
+            return [root]
+
+        while frontiers[0] and frontiers[1]:
+
+            # Espando la frontiera più piccola (0 = da root, 1 = da goal_cell)
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+
+            new_frontier = []
+            meet, best = None, None
+
+            for cell in frontiers[side]:
+
+                expanded += 1
+
+                for linked in cell.all_linked():
+
+                    if linked not in parents[side]:
+                        parents[side][linked] = cell
+                        distances[side][linked] = distances[side][cell] + 1
+                        new_frontier.append(linked)
+
+                    # Le due ricerche si incontrano: tengo la cella d'incontro migliore
+                    if linked in distances[other]:
+                        total = distances[side][linked] + distances[other][linked]
+                        if best is None or total < best:
+                            meet, best = linked, total
+
+            # Il livello è stato espanso tutto, quindi la cella d'incontro trovata è la migliore
+            if meet is not None:
+                BidirectionalBFS.expanded = expanded
+                return _join_paths(meet, parents[0], parents[1])
+
+            frontiers = (new_frontier, frontiers[1]) if side == 0 else (frontiers[0], new_frontier)
+
+        # Una delle due ricerche ha esaurito le celle: non esiste il percorso
+        BidirectionalBFS.expanded = expanded
+        return []
+    # ----------------------------------------------- #
+
+
+
+# A* bidirezionale.
+# Un A* parte da root verso goal_cell e uno da goal_cell verso root
+# (entrambi con distanza di Manhattan); ad ogni passo avanza quello con la coda più piccola.
+# Ogni volta che una cella è stata raggiunta da entrambi aggiorno il miglior costo mu:
+# la ricerca termina quando l'f_score minimo di una delle due code è almeno mu,
+# perché nessun percorso non ancora trovato può essere più corto.
+class BidirectionalAStar:
+
+    # Numero di celle estratte dalle code durante l'ultima chiamata di apply
+    expanded = 0
+
+    @staticmethod
+    def apply(grid, root, goal_cell):
+
+        targets = (goal_cell, root)
+        parents = ({root: None}, {goal_cell: None})
+        g_scores = ({root: 0}, {goal_cell: 0})
+
+        # Code di priorità (f_score, tie_breaker_counter, cell), come in AStar
+        open_sets = ([(AStar._manhattan_distance(root, goal_cell), 0, root)],
+                     [(AStar._manhattan_distance(goal_cell, root), 1, goal_cell)])
+        tie_breaker_counter = 2
+
+        infinity = float('inf')
+        mu, meet = infinity, None
+        expanded = 0
+
+        if root == goal_cell:
+            BidirectionalAStar.expanded = 0
+            return [root]
+
+        while open_sets[0] and open_sets[1]:
+
+            # Nessun percorso ancora da esplorare può costare meno di mu
+            if max(open_sets[0][0][0], open_sets[1][0][0]) >= mu:
+                break
+
+            side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+            other = 1 - side
+            g_score = g_scores[side]
+
+            current_f_score, _, current_cell = heapq.heappop(open_sets[side])
+            expanded += 1
+
+            # Elemento superato da un percorso migliore, lo ignoro
+            if current_f_score > g_score[current_cell] + AStar._manhattan_distance(current_cell, targets[side]):
+                continue
+
+            for neighbor in current_cell.all_linked():
+
+                current_g_score = g_score[current_cell] + 1
+
+                if current_g_score < g_score.get(neighbor, infinity):
+
+                    parents[side][neighbor] = current_cell
+                    g_score[neighbor] = current_g_score
+
+                    neighbor_f_score = current_g_score + AStar._manhattan_distance(neighbor, targets[side])
+                    heapq.heappush(open_sets[side], (neighbor_f_score, tie_breaker_counter, neighbor))
+                    tie_breaker_counter += 1
+
+                    # La cella è stata raggiunta anche dall'altra ricerca
+                    if neighbor in g_scores[other] and current_g_score + g_scores[other][neighbor] < mu:
+                        mu = current_g_score + g_scores[other][neighbor]
+                        meet = neighbor
+
+        BidirectionalAStar.expanded = expanded
+
+        if meet is None:
+            return []
+
+        return _join_paths(meet, parents[0], parents[1])
+    # ----------------------------------------------- #
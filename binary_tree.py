@@ -1,4 +1,12 @@
-import random
+from cell import EAST, SOUTH
+from packed_grid import PackedGrid
+from rng import resolve
+
+
+# Tabelle di traduzione per la versione su PackedGrid:
+# ogni decisione è il carattere "1" (taglio a est) oppure "0" (taglio a nord).
+_EAST_BITS = bytes(EAST if byte == ord("1") else 0 for byte in range(256))
+_SOUTH_BITS = bytes(SOUTH if byte == ord("0") else 0 for byte in range(256))
 
 
 # Algoritmo di generazione Binary Tree.
@@ -10,7 +18,13 @@ import random
 class BinaryTree:
 
     @staticmethod
-    def apply(grid):
+    def apply(grid, rng=None):
+
+        rng = resolve(rng)
+
+        # Su una griglia compatta uso la versione a blocchi
+        if isinstance(grid, PackedGrid):
+            return BinaryTree._apply_packed(grid, rng)
 
         # Itera su ogni cella
         for cell in grid.each_cell():
@@ -34,7 +48,48 @@ class BinaryTree:
             # Scelgo una cella a caso tra le due e mi linko ad essa,
             # creando un passaggio.
             if neighbors:
-                neighbor = random.choice(neighbors)
+                neighbor = rng.choice(neighbors)
                 cell.link(neighbor)
 
-        return grid
\ No newline at end of file
+        return grid
+
+
+    # Versione a blocchi per PackedGrid.
+    # Ogni cella è indipendente dalle altre, quindi per ogni blocco di righe estraggo
+    # in una volta sola una decisione casuale (nord/est) per ogni cella e correggo
+    # con delle slice la riga nord (solo est) e la colonna est (solo nord).
+    # I blocchi vengono scritti nella griglia uno alla volta (vedi PackedGrid._load_row_blocks),
+    # quindi la memoria usata è quella di un blocco anche su MappedGrid e TiledGrid.
+    @staticmethod
+    def _apply_packed(grid, rng):
+
+        grid._load_row_blocks(BinaryTree._carve_blocks(grid, rng))
+
+        return grid
+    # ----------------------------------------------- #
+
+
+    # Genera i blocchi di righe di grid come coppie (east, north) di bit di passaggio
+    @staticmethod
+    def _carve_blocks(grid, rng):
+
+        columns = grid.columns
+
+        for start, stop in grid._row_blocks():
+
+            size = (stop - start) * columns
+
+            # Un carattere "0"/"1" per cella, in ordine di riga
+            choices = bytearray(format(rng.getrandbits(size), f"0{size}b").encode())
+
+            # Riga nord: non posso andare a nord, quindi taglio sempre a est.
+            # Colonna est: non posso andare a est, quindi taglio sempre a nord.
+            # (la cella in alto a destra non taglia nulla: il suo "nord" non esiste)
+            if start == 0:
+                choices[0:columns] = b"1" * columns
+            choices[columns - 1::columns] = b"0" * (stop - start)
+
+            # Taglio a est: bit EAST della cella stessa.
+            # Taglio a nord: bit SOUTH da scrivere nella cella sopra.
+            yield choices.translate(_EAST_BITS), choices.translate(_SOUTH_BITS)
+    # ----------------------------------------------- #
@@ -1,6 +1,20 @@
 from distances import Distances # per BFS in calc_all_distances
 
 
+# Bit di direzione usati per salvare i collegamenti di una cella.
+# EAST e SOUTH sono gli stessi bit di passaggio usati da PackedGrid.
+EAST = 0b0001
+SOUTH = 0b0010
+NORTH = 0b0100
+WEST = 0b1000
+
+
+# Funzioni chiamate ad ogni link/unlink di una cella, come (cell, another_cell, linked).
+# Sono registrate dalle griglie che hanno dei listener (vedi Grid.subscribe):
+# se la lista è vuota, come durante la generazione, il costo è un solo controllo.
+link_listeners = []
+
+
 # Classe base, rappresenta una singola cella della griglia.
 # Definisce una cella come un insieme di coordinate 2D (row,column).
 # Inoltre, per ogni cella vengono salvate una serie di informazioni:
@@ -8,6 +22,10 @@ from distances import Distances # per BFS in calc_all_distances
 # celle con cui è collegata (cioè con cui crea un passaggio)
 class Cell:
 
+    # Con __slots__ ogni cella non ha un __dict__ proprio:
+    # su griglie da milioni di celle la memoria occupata si riduce di molto.
+    __slots__ = ("row", "column", "north", "south", "east", "west", "_links", "_hash")
+
     # Costruttore:
     # - creo una cella di posizione (row,column)
     # - con nessuna cella adiacente
@@ -22,10 +40,59 @@ class Cell:
         self.east = None
         self.west = None
 
-        # Utilizzo un dizionario booleano (valore di default = true)
-        # per tenere traccia di quali celle sono collegate
+        # Maschera a 4 bit (NORTH, SOUTH, EAST, WEST)
+        # per tenere traccia di quali celle adiacenti sono collegate
         # alla cella corrente, ovvero se sono collegate da un passaggio
-        self._links = {}
+        self._links = 0
+
+        # L'hash viene calcolato una volta sola, non ad ogni accesso ai dizionari
+        self._hash = hash((r, c))
+    # ----------------------------------------------- #
+
+
+    # Ritorna il bit di direzione di another_cell rispetto alla cella corrente,
+    # oppure 0 se le due celle non sono adiacenti.
+    def _direction(self, another_cell):
+
+        if another_cell is None:
+            return 0
+
+        # Caso comune: another_cell è proprio una delle celle adiacenti
+        if another_cell is self.north:
+            return NORTH
+        if another_cell is self.south:
+            return SOUTH
+        if another_cell is self.east:
+            return EAST
+        if another_cell is self.west:
+            return WEST
+
+        # Altrimenti confronto le coordinate
+        return self._position_direction(another_cell)
+    # ----------------------------------------------- #
+
+
+    # Come _direction, ma usando solamente le coordinate delle due celle
+    def _position_direction(self, another_cell):
+
+        if another_cell is None:
+            return 0
+
+        dr = another_cell.row - self.row
+        dc = another_cell.column - self.column
+
+        if dc == 0:
+            if dr == -1:
+                return NORTH
+            if dr == 1:
+                return SOUTH
+        elif dr == 0:
+            if dc == 1:
+                return EAST
+            if dc == -1:
+                return WEST
+
+        return 0
     # ----------------------------------------------- #
 
 
@@ -33,11 +100,20 @@ class Cell:
     # Se bidirectional = true, allora collega anche another_cell -> self
     def link(self, another_cell, bidirectional=True):
 
-        self._links[another_cell] = True
+        direction = self._direction(another_cell)
+
+        if not direction:
+            raise ValueError(f"Le celle {self} e {another_cell} non sono adiacenti")
 
+        self._links |= direction
+
+        # Il collegamento inverso (bidirectional = False) non viene notificato una seconda volta
         if bidirectional:
             another_cell.link(self, False)
 
+            for listener in link_listeners:
+                listener(self, another_cell, True)
+
         return self
     # ----------------------------------------------- #
 
@@ -46,26 +122,44 @@ class Cell:
     # Se bidirectional = true, allora scollega anche another_cell da self
     def unlink(self, another_cell, bidirectional=True):
 
-        if another_cell in self._links:
-            del self._links[another_cell]
+        self._links &= ~self._direction(another_cell)
 
         if bidirectional:
             another_cell.unlink(self, False)
 
+            for listener in link_listeners:
+                listener(self, another_cell, False)
+
         return self
     # ----------------------------------------------- #
 
 
     # Ritorna tutte le celle collegate alla cella corrente
-    # Una funzione ritorna una lista, una un dizionario
+    # (nell'ordine nord, sud, est, ovest)
     def all_linked(self):
-        return self._links.keys()
+
+        links = self._links
+        linked = []
+
+        if links & NORTH:
+            linked.append(self.north)
+
+        if links & SOUTH:
+            linked.append(self.south)
+
+        if links & EAST:
+            linked.append(self.east)
+
+        if links & WEST:
+            linked.append(self.west)
+
+        return linked
     # ----------------------------------------------- #
 
 
     # Ritorna true se la cella corrente è collegata ad un'altra cella
     def is_linked(self, another_cell):
-        return another_cell in self._links
+        return bool(self._links & self._direction(another_cell))
     # ----------------------------------------------- #
 
 
@@ -138,7 +232,7 @@ class Cell:
     # non possono essere usate come chiavi nel dizionario
     # in DistanceGrid: self.distances = None
     def __hash__(self):
-        return hash((self.row, self.column))
+        return self._hash
     # ----------------------------------------------- #
 
 
@@ -146,6 +240,11 @@ class Cell:
     # non possono essere usate come chiavi nel dizionario
     # in DistanceGrid: self.distances = None
     def __eq__(self, other):
+
+        # Caso comune: stessa istanza
+        if self is other:
+            return True
+
         return (isinstance(other, Cell) and
                 (self.row == other.row) and
                 (self.column == other.column))
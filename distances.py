@@ -1,3 +1,9 @@
+import sys
+from array import array
+
+import maze_file
+
+
 # Classe usata per salvare le distanze di ogni cella da una cella root arbitraria.
 class Distances:
 
@@ -8,6 +14,82 @@ class Distances:
 
         self.root = root
         self._cells = {root: 0} 
+
+        # Sorgente più vicina di ogni cella (indice in sources), solo per flood con più sorgenti
+        self.sources = [root]
+        self._source_ids = None
+    # ----------------------------------------------- #
+
+
+    # BFS da più sorgenti contemporaneamente: ogni cella riceve la distanza
+    # dalla sorgente più vicina (a parità di distanza vince la prima in sources).
+    # La visita si ferma prima di coprire tutto il labirinto se:
+    #   - max_radius è indicato: vengono raggiunte solo le celle a distanza <= max_radius
+    #   - targets è indicato: appena tutte le celle di targets hanno una distanza
+    # così il costo dipende solamente dalla regione visitata.
+    # La root del risultato è la prima sorgente.
+    @classmethod
+    def flood(cls, sources, max_radius=None, targets=None):
+
+        sources = list(dict.fromkeys(sources))  # rimuovo i duplicati mantenendo l'ordine
+
+        distances = cls(sources[0])
+        distances.sources = sources
+        cells = distances._cells
+        source_ids = distances._source_ids = {}
+
+        for source_id, source in enumerate(sources):
+            cells[source] = 0
+            source_ids[source] = source_id
+
+        remaining = None
+        if targets is not None:
+            remaining = set(targets).difference(sources)
+
+        frontier = sources
+        radius = 0
+
+        while frontier and (remaining is None or remaining):
+
+            if max_radius is not None and radius >= max_radius:
+                break
+
+            radius += 1
+            new_frontier = []
+
+            for cell in frontier:
+
+                source_id = source_ids[cell]
+
+                for linked in cell.all_linked():
+
+                    if linked in cells:
+                        continue
+
+                    cells[linked] = radius
+                    source_ids[linked] = source_id
+                    new_frontier.append(linked)
+
+                    if remaining is not None:
+                        remaining.discard(linked)
+
+            frontier = new_frontier
+
+        return distances
+    # ----------------------------------------------- #
+
+
+    # Ritorna l'indice (in sources) della sorgente più vicina a cell,
+    # oppure None se la cella non è stata raggiunta.
+    def source_id(self, cell):
+
+        if cell not in self._cells:
+            return None
+
+        if self._source_ids is None:
+            return 0
+
+        return self._source_ids[cell]
     # ----------------------------------------------- #
 
 
@@ -38,21 +120,30 @@ class Distances:
 
     # Utilizzando la matrice delle distanze pre-calcolata,
     # ricostruisce un cammino minimo per quel percorso (root <-> cell_goal).
+    # Solleva ValueError se cell_goal non è stata raggiunta
+    # (per esempio oltre max_radius o in un'altra componente, vedi flood).
     def shortest_path_to(self, cell_goal):
 
+        if self[cell_goal] is None:
+            raise ValueError(f"La cella {cell_goal} non è stata raggiunta")
+
         current_cell = cell_goal
-        backtrack = Distances(self.root) # calcola distanze dalla root
+
+        # Parto dalla cella goal: la root del cammino è la sorgente raggiunta alla fine
+        # (con più sorgenti, vedi flood, non è per forza self.root)
+        backtrack = Distances(current_cell)
         backtrack[current_cell] = self[current_cell]
 
-        # Finché non arrivo alla cella root
-        while current_cell != self.root:
+        # Finché non arrivo alla cella root (o ad una delle sorgenti, vedi flood)
+        while self[current_cell] > 0:
 
             # Itero su tutte le celle collegate alla cella corrente
             for neighbor in current_cell.all_linked():
 
                 # Se una cella collegata ha distanza minore della cella corrente
-                # è quella da cui si è arrivati
-                if self[neighbor] < self[current_cell]:
+                # è quella da cui si è arrivati.
+                # Le celle senza distanza (oltre max_radius di flood) vengono saltate.
+                if self[neighbor] is not None and self[neighbor] < self[current_cell]:
 
                     # Rendo la cella corrente quella con distanza minore (neighbor),
                     # esco dal ciclo e ricomincio con la nuova cella corrente
@@ -60,6 +151,7 @@ class Distances:
                     current_cell = neighbor
                     break
 
+        backtrack.root = current_cell
         return backtrack # dizionario (cell,distance)
     # ----------------------------------------------- #
 
@@ -79,6 +171,273 @@ class Distances:
 
         return max_cell, max_distance # ritorna coppia (cell,distance)
     # ----------------------------------------------- #
-    
-    
-    
\ No newline at end of file
+
+
+    # Salva le distanze su file in formato binario (vedi maze_file.py):
+    # un array int32 con una distanza per ogni cella di grid, -1 se non raggiunta.
+    # compression può essere None, "zlib" oppure "lzma".
+    def save(self, path, grid, compression=None):
+
+        flags = maze_file.compression_flags(compression)
+
+        values = array("i", [-1]) * (grid.rows * grid.columns)
+        for cell, dist in self._cells.items():
+            values[cell.row * grid.columns + cell.column] = dist
+
+        # Il formato su file è little-endian
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        with open(path, "wb") as f:
+            f.write(maze_file.pack_header(grid.rows, grid.columns, flags, maze_file.DISTANCES_MAGIC))
+            f.write(maze_file.ROOT.pack(self.root.row, self.root.column))
+            f.write(maze_file.compress(values.tobytes(), flags))
+    # ----------------------------------------------- #
+
+
+    # Carica le distanze salvate con save(), associandole alle celle di grid.
+    @classmethod
+    def load(cls, path, grid):
+
+        with open(path, "rb") as f:
+            flags, rows, columns = maze_file.unpack_header(f.read(maze_file.HEADER.size),
+                                                           maze_file.DISTANCES_MAGIC)
+            root_row, root_column = maze_file.ROOT.unpack(f.read(maze_file.ROOT.size))
+            data = maze_file.decompress(f.read(), flags)
+
+        if (rows, columns) != (grid.rows, grid.columns):
+            raise ValueError(f"Le distanze in {path} sono per una griglia {rows}x{columns}")
+
+        values = array("i")
+        values.frombytes(data)
+
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        distances = cls(grid[root_row, root_column])
+        cells = distances._cells
+
+        for index, dist in enumerate(values):
+            if dist >= 0:
+                cells[grid[divmod(index, columns)]] = dist
+
+        return distances
+    # ----------------------------------------------- #
+
+
+
+# Distanze salvate in un array compatto di interi (int32), uno per cella della griglia,
+# indicizzato da row * columns + column: -1 indica una cella non raggiunta.
+# Stessa interfaccia di Distances ([], all_cells, shortest_path_to, longest_path_from, save),
+# ma senza dizionario: l'accesso non calcola hash e longest_path_from
+# diventa una ricerca del massimo fatta direttamente sull'array.
+# values() espone l'array senza copie (memoryview), per chi lo consuma in blocco.
+class ArrayDistances(Distances):
+
+    def __init__(self, root, grid, values=None):
+
+        self.root = root
+        self.grid = grid
+        self.sources = [root]
+        self._source_ids = None
+
+        if values is None:
+            values = array("i", [-1]) * (grid.rows * grid.columns)
+            values[self._index(root)] = 0
+
+        self._values = values
+    # ----------------------------------------------- #
+
+
+    # Posizione della cella nell'array
+    def _index(self, cell):
+        return cell.row * self.grid.columns + cell.column
+    # ----------------------------------------------- #
+
+
+    def __getitem__(self, cell):
+
+        dist = self._values[self._index(cell)]
+        return dist if dist >= 0 else None
+    # ----------------------------------------------- #
+
+
+    def __setitem__(self, cell, distance):
+        self._values[self._index(cell)] = distance
+    # ----------------------------------------------- #
+
+
+    # Le celle raggiunte, in ordine di riga
+    @property
+    def all_cells(self):
+        cell_at = self.grid._cell
+        return [cell_at(index) for index, dist in enumerate(self._values) if dist >= 0]
+    # ----------------------------------------------- #
+
+
+    # Vista (senza copia) dell'array delle distanze, formato "i" (int32), -1 = non raggiunta.
+    # Con NumPy installato numpy.asarray(distances.values()) condivide la stessa memoria.
+    def values(self):
+        return memoryview(self._values)
+    # ----------------------------------------------- #
+
+
+    # Come Distances.flood, ma sugli indici della griglia e con il risultato in array.
+    # grid è obbligatoria: serve per dimensionare gli array e trovare le celle collegate.
+    @classmethod
+    def flood(cls, sources, max_radius=None, targets=None, grid=None):
+
+        if grid is None:
+            raise ValueError("ArrayDistances.flood richiede la griglia (grid)")
+
+        sources = list(dict.fromkeys(sources))  # rimuovo i duplicati mantenendo l'ordine
+
+        size = grid.rows * grid.columns
+        columns = grid.columns
+        linked_indices = grid._linked_indices
+
+        values = array("i", [-1]) * size
+        source_ids = array("i", [-1]) * size
+
+        frontier = []
+        for source_id, source in enumerate(sources):
+            index = source.row * columns + source.column
+            values[index] = 0
+            source_ids[index] = source_id
+            frontier.append(index)
+
+        remaining = None
+        if targets is not None:
+            remaining = {cell.row * columns + cell.column for cell in targets}.difference(frontier)
+
+        radius = 0
+
+        while frontier and (remaining is None or remaining):
+
+            if max_radius is not None and radius >= max_radius:
+                break
+
+            radius += 1
+            new_frontier = []
+
+            for index in frontier:
+
+                source_id = source_ids[index]
+
+                for linked in linked_indices(index):
+
+                    if values[linked] >= 0:
+                        continue
+
+                    values[linked] = radius
+                    source_ids[linked] = source_id
+                    new_frontier.append(linked)
+
+                    if remaining is not None:
+                        remaining.discard(linked)
+
+            frontier = new_frontier
+
+        distances = cls(sources[0], grid, values)
+        distances.sources = sources
+        distances._source_ids = source_ids
+
+        return distances
+    # ----------------------------------------------- #
+
+
+    # Indice (in sources) della sorgente più vicina, None se la cella non è raggiunta
+    def source_id(self, cell):
+
+        if self[cell] is None:
+            return None
+
+        if self._source_ids is None:
+            return 0
+
+        return self._source_ids[self._index(cell)]
+    # ----------------------------------------------- #
+
+
+    # Come Distances.shortest_path_to, ma risalendo sugli indici della griglia.
+    # Solleva ValueError se cell_goal non è stata raggiunta.
+    def shortest_path_to(self, cell_goal):
+
+        if self[cell_goal] is None:
+            raise ValueError(f"La cella {cell_goal} non è stata raggiunta")
+
+        values = self._values
+        linked_indices = self.grid._linked_indices
+
+        # Nessuna cella pre-inserita: la root del cammino è la sorgente raggiunta alla fine
+        path_values = array("i", [-1]) * len(values)
+
+        current = self._index(cell_goal)
+        path_values[current] = values[current]
+
+        while values[current] > 0:
+
+            # La cella collegata con distanza minore è quella da cui si è arrivati
+            for linked in linked_indices(current):
+                if 0 <= values[linked] < values[current]:
+                    current = linked
+                    break
+
+            path_values[current] = values[current]
+
+        return ArrayDistances(self.grid._cell(current), self.grid, path_values)
+    # ----------------------------------------------- #
+
+
+    # La cella più lontana è il massimo dell'array (a parità, la prima in ordine di riga)
+    def longest_path_from(self):
+
+        values = self._values
+        max_distance = max(values)
+
+        if max_distance <= 0:
+            return self.root, 0
+
+        return self.grid._cell(values.index(max_distance)), max_distance
+    # ----------------------------------------------- #
+
+
+    # Stesso formato di Distances.save, ma l'array è già quello da scrivere
+    def save(self, path, grid=None, compression=None):
+
+        grid = self.grid if grid is None else grid
+        flags = maze_file.compression_flags(compression)
+
+        values = self._values
+        if sys.byteorder != "little":
+            values = array("i", values)
+            values.byteswap()
+
+        with open(path, "wb") as f:
+            f.write(maze_file.pack_header(grid.rows, grid.columns, flags, maze_file.DISTANCES_MAGIC))
+            f.write(maze_file.ROOT.pack(self.root.row, self.root.column))
+            f.write(maze_file.compress(values.tobytes(), flags))
+    # ----------------------------------------------- #
+
+
+    # Carica le distanze salvate con save() senza passare da un dizionario
+    @classmethod
+    def load(cls, path, grid):
+
+        with open(path, "rb") as f:
+            flags, rows, columns = maze_file.unpack_header(f.read(maze_file.HEADER.size),
+                                                           maze_file.DISTANCES_MAGIC)
+            root_row, root_column = maze_file.ROOT.unpack(f.read(maze_file.ROOT.size))
+            data = maze_file.decompress(f.read(), flags)
+
+        if (rows, columns) != (grid.rows, grid.columns):
+            raise ValueError(f"Le distanze in {path} sono per una griglia {rows}x{columns}")
+
+        values = array("i")
+        values.frombytes(data)
+
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        return cls(grid[root_row, root_column], grid, values)
+    # ----------------------------------------------- #
@@ -0,0 +1,239 @@
+import heapq  # coda di priorità (min-heap)
+
+from astar import AStar
+
+
+# Risolutore incrementale D* Lite.
+# La ricerca parte dalla goal_cell verso la partenza e conserva il suo stato
+# (g, rhs e coda di priorità) tra una chiamata e l'altra.
+# Il risolutore si registra sulla griglia (Grid.subscribe): quando un passaggio viene
+# aperto o chiuso (cell.link / cell.unlink oppure grid.link / grid.unlink) vengono aggiornate solamente
+# le due celle coinvolte, e la chiamata successiva di path() ripara
+# soltanto la parte di ricerca resa non più valida dalla modifica,
+# invece di ripetere un A* completo.
+#
+#   g[cell]    distanza dalla goal_cell calcolata dall'ultima espansione
+#   rhs[cell]  distanza prevista guardando le celle collegate (min g + 1)
+# Una cella è "consistente" quando g == rhs; la coda contiene quelle inconsistenti.
+#
+# Uso:
+#   with DStarLite(grid, root, goal_cell) as solver:
+#       solver.path()
+# close() (chiamata da with) smette di ricevere le modifiche della griglia;
+# un risolutore mai chiuso viene comunque rimosso dalla griglia quando viene eliminato.
+class DStarLite:
+
+    def __init__(self, grid, root, goal_cell):
+
+        self.grid = grid
+        self.root = root
+        self.goal_cell = goal_cell
+
+        # Celle estratte dalla coda durante l'ultima chiamata di path()
+        self.expanded = 0
+
+        self._reset()
+
+        grid.subscribe(self._on_link_change)
+        self._subscribed = True
+    # ----------------------------------------------- #
+
+
+    # Azzera lo stato della ricerca: la prossima path() riparte da zero
+    def _reset(self):
+
+        self._g = {}
+        self._rhs = {self.goal_cell: 0}
+        self._km = 0                # correzione delle chiavi quando la partenza si sposta
+
+        # Coda con cancellazione "pigra": _open contiene la chiave valida di ogni cella in coda
+        self._open_set = []
+        self._open = {}
+        self._tie_breaker_counter = 0
+
+        self._changed = []          # passaggi modificati dall'ultima chiamata di path()
+
+        self._push(self.goal_cell)
+    # ----------------------------------------------- #
+
+
+    # Smette di ricevere le modifiche della griglia (chiamarla più volte non ha effetto)
+    def close(self):
+
+        if self._subscribed:
+            self.grid.unsubscribe(self._on_link_change)
+            self._subscribed = False
+    # ----------------------------------------------- #
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    # ----------------------------------------------- #
+
+
+    # Listener registrato sulla griglia: le modifiche vengono applicate alla prossima path()
+    def _on_link_change(self, cell, another_cell, linked):
+        self._changed.append((cell, another_cell))
+    # ----------------------------------------------- #
+
+
+    def _g_score(self, cell):
+        return self._g.get(cell, float('inf'))
+
+    def _rhs_score(self, cell):
+        return self._rhs.get(cell, float('inf'))
+    # ----------------------------------------------- #
+
+
+    # Chiave di priorità di una cella: (stima del cammino totale, distanza dalla goal_cell)
+    def _key(self, cell):
+
+        best = min(self._g_score(cell), self._rhs_score(cell))
+        return (best + AStar._manhattan_distance(self.root, cell) + self._km, best)
+    # ----------------------------------------------- #
+
+
+    # Inserisce (o aggiorna) una cella nella coda
+    def _push(self, cell):
+
+        key = self._key(cell)
+        self._open[cell] = key
+
+        heapq.heappush(self._open_set, (key, self._tie_breaker_counter, cell))
+        self._tie_breaker_counter += 1
+    # ----------------------------------------------- #
+
+
+    # Ritorna la chiave minima valida della coda, scartando gli elementi superati
+    def _top_key(self):
+
+        open_set = self._open_set
+
+        while open_set:
+
+            key, _, cell = open_set[0]
+
+            if self._open.get(cell) == key:
+                return key
+
+            heapq.heappop(open_set)
+
+        return (float('inf'), float('inf'))
+    # ----------------------------------------------- #
+
+
+    # Ricalcola rhs di una cella e la rimette in coda se è inconsistente
+    def _update_cell(self, cell):
+
+        if cell != self.goal_cell:
+            self._rhs[cell] = min((self._g_score(linked) + 1 for linked in cell.all_linked()),
+                                  default=float('inf'))
+
+        if self._g_score(cell) != self._rhs_score(cell):
+            self._push(cell)
+        else:
+            self._open.pop(cell, None)
+    # ----------------------------------------------- #
+
+
+    # Espande le celle inconsistenti finché la partenza non ha la distanza corretta
+    def _compute_shortest_path(self):
+
+        root = self.root
+        expanded = 0
+
+        while self._top_key() < self._key(root) or self._rhs_score(root) != self._g_score(root):
+
+            if not self._open_set:
+                break
+
+            old_key, _, cell = heapq.heappop(self._open_set)
+            expanded += 1
+
+            new_key = self._key(cell)
+
+            # La chiave è cambiata (la partenza si è spostata): la rimetto in coda
+            if old_key < new_key:
+                self._push(cell)
+                continue
+
+            del self._open[cell]
+
+            # Cella sovra-consistente: la sua distanza diventa definitiva
+            if self._g_score(cell) > self._rhs_score(cell):
+                self._g[cell] = self._rhs[cell]
+
+            # Cella sotto-consistente (un passaggio è stato chiuso): la invalido
+            else:
+                self._g.pop(cell, None)
+                self._update_cell(cell)
+
+            for linked in cell.all_linked():
+                self._update_cell(linked)
+
+        self.expanded = expanded
+    # ----------------------------------------------- #
+
+
+    # Sposta la partenza su cell (per esempio dopo aver fatto qualche passo lungo il percorso)
+    def move_to(self, cell):
+
+        self._km += AStar._manhattan_distance(self.root, cell)
+        self.root = cell
+    # ----------------------------------------------- #
+
+
+    # Ritorna il percorso minimo dalla partenza alla goal_cell (come AStar.apply),
+    # oppure una lista vuota se non esiste.
+    # Le modifiche della griglia dall'ultima chiamata vengono riparate qui.
+    # Se il percorso non scende più lungo g (la griglia è cambiata senza notifica,
+    # per esempio con un collegamento non bidirezionale) la ricerca riparte da zero.
+    def path(self):
+
+        changed, self._changed = self._changed, []
+
+        for cell, another_cell in changed:
+            self._update_cell(cell)
+            self._update_cell(another_cell)
+
+        solution_path = self._descend()
+
+        if solution_path is None:
+            self._reset()
+            solution_path = self._descend()
+
+        return solution_path or []
+    # ----------------------------------------------- #
+
+
+    # Ripara la ricerca e scende lungo le distanze g dalla partenza alla goal_cell.
+    # Ritorna il percorso, una lista vuota se la goal_cell non è raggiungibile,
+    # oppure None se un passo non riduce g (stato non più valido).
+    def _descend(self):
+
+        self._compute_shortest_path()
+
+        current_g_score = self._g_score(self.root)
+
+        if current_g_score == float('inf'):
+            return []
+
+        solution_path = [self.root]
+        current_cell = self.root
+
+        while current_cell != self.goal_cell:
+
+            current_cell = min(current_cell.all_linked(), key=self._g_score, default=None)
+
+            # Ogni passo deve avvicinare di uno alla goal_cell
+            if current_cell is None or self._g_score(current_cell) != current_g_score - 1:
+                return None
+
+            current_g_score -= 1
+            solution_path.append(current_cell)
+
+        return solution_path
+    # ----------------------------------------------- #
@@ -0,0 +1,113 @@
+from cell import EAST, SOUTH
+from rng import resolve
+
+
+# Algoritmo di generazione di Eller.
+# Costruisce il labirinto una riga alla volta, tenendo in memoria solamente
+# l'insieme (componente connessa) a cui appartiene ogni cella della riga corrente:
+# - collega a caso celle adiacenti della riga che appartengono a insiemi diversi
+# - per ogni insieme scava verso sud da almeno una cella (e a caso dalle altre)
+# - le celle della riga successiva non raggiunte da sud formano nuovi insiemi
+# Nell'ultima riga vengono uniti tutti gli insiemi rimasti, così il labirinto è perfetto.
+#
+# La memoria usata è O(columns) indipendentemente dal numero di righe:
+# le righe vengono restituite come record di bit EAST/SOUTH (vedi maze_file.py)
+# e possono essere scritte su disco man mano (vedi maze_file.write_rows).
+class Eller:
+
+    @staticmethod
+    def apply(grid, rng=None):
+
+        columns = grid.columns
+
+        with grid._writable_walls(blank=True) as walls:
+            for row, record in enumerate(Eller.rows(columns, grid.rows, rng)):
+                walls[row * columns:(row + 1) * columns] = record
+
+        return grid
+    # ----------------------------------------------- #
+
+
+    # Generatore delle righe di un labirinto largo columns.
+    # Ogni riga è un bytes di columns byte con i bit EAST/SOUTH di ogni cella.
+    # Se rows è None il labirinto è infinito: per terminarlo si chiede la riga
+    # di chiusura con send(True) invece di next(), per esempio
+    #     records = Eller.rows(columns)
+    #     first = next(records)
+    #     last = records.send(True)
+    # La riga ritornata da send(True) unisce tutti gli insiemi rimasti e non scava
+    # verso sud: è l'ultima del labirinto (perfetto) e il generatore poi termina.
+    @staticmethod
+    def rows(columns, rows=None, rng=None):
+
+        rng = resolve(rng)
+
+        # Insieme di ogni cella della riga corrente (None = cella non ancora in un insieme)
+        sets = [None] * columns
+        next_set = 0
+        row = 0
+
+        while rows is None or row < rows:
+
+            last_row = rows is not None and row == rows - 1
+            record = bytearray(columns)
+
+            # Le celle non raggiunte dalla riga sopra formano nuovi insiemi
+            for column in range(columns):
+                if sets[column] is None:
+                    sets[column] = next_set
+                    next_set += 1
+
+            # Unione degli insiemi della riga (union-find sugli identificativi)
+            parent = {}
+
+            def find(set_id):
+                while set_id in parent:
+                    set_id = parent[set_id]
+                return set_id
+
+            # Collego a est le celle di insiemi diversi:
+            # a caso, oppure sempre se è l'ultima riga
+            flips = rng.getrandbits(columns)
+
+            for column in range(columns - 1):
+
+                left, right = find(sets[column]), find(sets[column + 1])
+
+                if left != right and (last_row or flips >> column & 1):
+                    record[column] |= EAST
+                    parent[right] = left
+
+            # Identificativo finale di ogni cella e celle di ogni insieme
+            groups = {}
+            for column in range(columns):
+                set_id = find(sets[column])
+                sets[column] = set_id
+                groups.setdefault(set_id, []).append(column)
+
+            # Scavo verso sud: almeno una cella per insieme, le altre a caso
+            if not last_row:
+
+                below = [None] * columns
+
+                for set_id, cells in groups.items():
+
+                    flips = rng.getrandbits(len(cells))
+
+                    if not flips:
+                        flips = 1 << rng.randrange(len(cells))
+
+                    for position, column in enumerate(cells):
+                        if flips >> position & 1:
+                            record[column] |= SOUTH
+                            below[column] = set_id
+
+                sets = below
+
+            close = yield bytes(record)
+            row += 1
+
+            # Chiusura richiesta con send(True): la prossima riga è l'ultima
+            if close and not last_row:
+                rows = row + 1
+    # ----------------------------------------------- #
@@ -1,7 +1,13 @@
-from random import randrange
+import types
+import weakref
+from array import array
+from contextlib import contextmanager
+
 from PIL import Image, ImageDraw, ImageFont  # Libreria Pillow per salvare come immagine PNG il labirinto
-from cell import Cell
-from distances import Distances
+import maze_file
+from rng import resolve
+from cell import Cell, EAST, SOUTH, NORTH, WEST, link_listeners
+from distances import Distances, ArrayDistances
 
 
 # Nessun _	| Pubblico, per uso generale
@@ -32,6 +38,8 @@ class Grid:
 
         self._distances = None      # distanze di ogni cella da una root arbitraria
         self._maxdistance = 0       # distanza massima dalla root
+
+        self._listeners = []        # riferimenti alle funzioni avvisate ad ogni link/unlink della griglia
     # ----------------------------------------------- #
 
 
@@ -105,15 +113,95 @@ class Grid:
 
 
     # Ritorna una cella casuale della griglia.
-    def random_cell(self):
+    # rng è la sorgente casuale da usare (vedi rng.py), di default il modulo random.
+    def random_cell(self, rng=None):
 
-        row = randrange(self.rows)
-        column = randrange(self.columns)
+        rng = resolve(rng)
+
+        row = rng.randrange(self.rows)
+        column = rng.randrange(self.columns)
 
         return self[row, column]
     # ----------------------------------------------- #
 
 
+    # Registra listener(cell, another_cell, linked), chiamata ad ogni passaggio
+    # di questa griglia aperto (linked = True) o chiuso (linked = False),
+    # sia con cell.link / cell.unlink sia con link / unlink della griglia.
+    # Solo i collegamenti bidirezionali (quelli di default) vengono notificati.
+    # Il metodo di un oggetto è tenuto con un riferimento debole (weakref.WeakMethod):
+    # quando l'oggetto viene eliminato (per esempio un DStarLite mai chiuso)
+    # il listener viene rimosso da solo e la griglia non resta in vita per lui.
+    def subscribe(self, listener):
+
+        # Mi registro sulle celle solo quando c'è almeno un listener
+        if not self._listeners:
+            link_listeners.append(self._on_cell_link)
+
+        if isinstance(listener, types.MethodType):
+            reference = weakref.WeakMethod(listener, self._drop_listener)
+        else:
+            reference = lambda: listener
+
+        self._listeners.append(reference)
+    # ----------------------------------------------- #
+
+
+    # Rimuove un listener registrato con subscribe
+    def unsubscribe(self, listener):
+
+        for reference in self._listeners:
+            if reference() == listener:
+                self._drop_listener(reference)
+                return
+
+        raise ValueError(f"Il listener {listener} non è registrato")
+    # ----------------------------------------------- #
+
+
+    # Rimuove il riferimento a un listener (chiamata anche quando il suo oggetto viene eliminato)
+    def _drop_listener(self, reference):
+
+        if reference not in self._listeners:
+            return
+
+        self._listeners.remove(reference)
+
+        if not self._listeners:
+            link_listeners.remove(self._on_cell_link)
+    # ----------------------------------------------- #
+
+
+    # Ritorna true se cell è una cella di questa griglia
+    def _owns(self, cell):
+        return self[cell.row, cell.column] is cell
+    # ----------------------------------------------- #
+
+
+    # Riceve ogni link/unlink delle celle (di qualunque griglia)
+    # e lo inoltra ai listener se riguarda questa griglia
+    def _on_cell_link(self, cell, another_cell, linked):
+
+        if self._owns(cell):
+            for reference in tuple(self._listeners):
+                listener = reference()
+                if listener is not None:
+                    listener(cell, another_cell, linked)
+    # ----------------------------------------------- #
+
+
+    # Apre il passaggio tra due celle adiacenti (i listener vengono avvisati da cell.link)
+    def link(self, cell, another_cell):
+        cell.link(another_cell)
+    # ----------------------------------------------- #
+
+
+    # Chiude il passaggio tra due celle adiacenti
+    def unlink(self, cell, another_cell):
+        cell.unlink(another_cell)
+    # ----------------------------------------------- #
+
+
     # Ritorna la grandezza della griglia.
     def size(self):
         return self.rows * self.columns
@@ -140,6 +228,173 @@ class Grid:
 
 
 
+    # Ritorna la cella di indice index (index = row * columns + column)
+    def _cell(self, index):
+        return self[divmod(index, self.columns)]
+    # ----------------------------------------------- #
+
+
+    # Ritorna gli indici delle celle collegate alla cella di indice index
+    # (nell'ordine nord, sud, est, ovest), leggendo la maschera dei collegamenti.
+    # Gli algoritmi che lavorano sugli indici funzionano così con ogni tipo di griglia.
+    def _linked_indices(self, index):
+
+        columns = self.columns
+        links = self._cell(index)._links
+        linked = []
+
+        if links & NORTH:
+            linked.append(index - columns)
+
+        if links & SOUTH:
+            linked.append(index + columns)
+
+        if links & EAST:
+            linked.append(index + 1)
+
+        if links & WEST:
+            linked.append(index - 1)
+
+        return linked
+    # ----------------------------------------------- #
+
+
+    # Calcola la distanza di ogni cella da root con una BFS per livelli sugli indici.
+    # Stesso risultato di root.calc_all_distances(), ma in un ArrayDistances
+    # (un intero per cella) invece che in un dizionario.
+    def calc_distances(self, root):
+
+        values = array("i", [-1]) * self.size()
+        linked_indices = self._linked_indices
+
+        root_index = root.row * self.columns + root.column
+        values[root_index] = 0
+
+        frontier = [root_index]
+        distance = 0
+
+        while frontier:
+
+            distance += 1
+            new_frontier = []
+
+            for index in frontier:
+                for linked in linked_indices(index):
+                    if values[linked] < 0:
+                        values[linked] = distance
+                        new_frontier.append(linked)
+
+            frontier = new_frontier
+
+        return ArrayDistances(root, self, values)
+    # ----------------------------------------------- #
+
+
+    # Calcola il diametro del labirinto (il cammino più lungo) con una sola DFS iterativa.
+    # Il labirinto è un albero: per ogni cella tengo le due altezze maggiori
+    # tra i suoi sottoalberi, e il diametro passa per la cella in cui la loro somma è massima.
+    # Considera la componente di root (di default la cella (0, 0)).
+    # Ritorna (start, end, length, path, eccentricities):
+    #   path            lista delle celle da start a end (length + 1 celle)
+    #   eccentricities  se richiesto, array con la distanza massima da ogni cella
+    #                   verso qualunque altra cella (-1 = non raggiunta), altrimenti None
+    def diameter(self, root=None, eccentricities=False):
+
+        if root is None:
+            root = self[0, 0]
+
+        size = self.size()
+        linked_indices = self._linked_indices
+        root_index = root.row * self.columns + root.column
+
+        # DFS iterativa: order contiene le celle in pre-ordine (ogni padre prima dei figli)
+        parent = array("i", [-1]) * size
+        parent[root_index] = root_index
+        order = []
+        stack = [root_index]
+
+        while stack:
+
+            index = stack.pop()
+            order.append(index)
+
+            for linked in linked_indices(index):
+                if parent[linked] < 0:
+                    parent[linked] = index
+                    stack.append(linked)
+
+        # Le due altezze maggiori di ogni cella e i figli da cui arrivano
+        first = array("i", [0]) * size
+        second = array("i", [0]) * size
+        first_child = array("i", [-1]) * size
+        second_child = array("i", [-1]) * size
+
+        length, center = 0, root_index
+
+        # In ordine inverso ogni cella viene visitata dopo tutti i suoi figli
+        for index in reversed(order):
+
+            height = first[index]
+            total = height + second[index]
+
+            if total > length:
+                length, center = total, index
+
+            up = parent[index]
+
+            # La root è l'unica cella che ha sé stessa come padre
+            if up == index:
+                continue
+
+            height += 1
+
+            if height > first[up]:
+                second[up], second_child[up] = first[up], first_child[up]
+                first[up], first_child[up] = height, index
+            elif height > second[up]:
+                second[up], second_child[up] = height, index
+
+        # Ricostruisco il cammino scendendo dal centro lungo i due sottoalberi più alti
+        path = []
+        index = first_child[center]
+        while index >= 0:
+            path.append(index)
+            index = first_child[index]
+
+        path.reverse()
+        path.append(center)
+
+        index = second_child[center]
+        while index >= 0:
+            path.append(index)
+            index = first_child[index]
+
+        cells = [self._cell(index) for index in path]
+
+        if not eccentricities:
+            return cells[0], cells[-1], length, cells, None
+
+        # Seconda passata (dall'alto): above è il cammino più lungo che esce
+        # dal sottoalbero della cella passando per il padre
+        above = array("i", [0]) * size
+        eccentricity = array("i", [-1]) * size
+
+        for index in order:
+
+            eccentricity[index] = max(first[index], above[index])
+
+            for linked in linked_indices(index):
+
+                if linked == parent[index] or parent[linked] != index:
+                    continue
+
+                sibling = second[index] if linked == first_child[index] else first[index]
+                above[linked] = 1 + max(above[index], sibling)
+
+        return cells[0], cells[-1], length, cells, eccentricity
+    # ----------------------------------------------- #
+
+
     # Raggruppa i vicoli ciechi, ovvero le singole celle
     # che hanno solamente un'altra cella collegata.
     def deadends(self):
@@ -157,6 +412,103 @@ class Grid:
     # ----------------------------------------------- #
 
 
+    # Ritorna i bit di passaggio EAST/SOUTH di ogni cella,
+    # un byte per cella in ordine di riga (vedi maze_file.py).
+    def _dump_walls(self):
+
+        walls = bytearray(self.size())
+        index = 0
+
+        for cell in self.each_cell():
+            walls[index] = cell._links & (EAST | SOUTH)  # stessi bit del formato su file
+            index += 1
+
+        return walls
+    # ----------------------------------------------- #
+
+
+    # Sostituisce i collegamenti di ogni cella con quelli descritti da walls
+    # (stesso formato di _dump_walls).
+    def _load_walls(self, walls):
+
+        columns = self.columns
+        index = 0
+
+        for cell in self.each_cell():
+
+            links = walls[index] & (EAST | SOUTH)
+
+            if cell.row > 0 and walls[index - columns] & SOUTH:
+                links |= NORTH
+
+            if cell.column > 0 and walls[index - 1] & EAST:
+                links |= WEST
+
+            cell._links = links
+            index += 1
+    # ----------------------------------------------- #
+
+
+    # Ritorna il buffer scrivibile con i bit di passaggio di tutta la griglia
+    # (vedi PackedGrid), oppure None: le celle di Grid non hanno un buffer contiguo.
+    def _walls_buffer(self):
+        return None
+    # ----------------------------------------------- #
+
+
+    # Bit di passaggio scrivibili di tutta la griglia, per i generatori che lavorano con i byte:
+    #     with grid._writable_walls() as walls:
+    #         walls[index] |= EAST
+    # Se la griglia ha un buffer (_walls_buffer) le modifiche vanno direttamente lì,
+    # altrimenti su una copia temporanea caricata con _load_walls all'uscita dal with.
+    # Con blank = True la copia parte vuota invece che da _dump_walls:
+    # il generatore deve riscrivere tutte le celle.
+    @contextmanager
+    def _writable_walls(self, blank=False):
+
+        walls = self._walls_buffer()
+
+        if walls is not None:
+            yield walls
+            return
+
+        walls = bytearray(self.size()) if blank else bytearray(self._dump_walls())
+        yield walls
+        self._load_walls(walls)
+    # ----------------------------------------------- #
+
+
+    # Salva il labirinto su file in formato binario (vedi maze_file.py).
+    # compression può essere None, "zlib" oppure "lzma".
+    def save(self, path, compression=None):
+
+        flags = maze_file.compression_flags(compression)
+
+        with open(path, "wb") as f:
+            f.write(maze_file.pack_header(self.rows, self.columns, flags))
+            f.write(maze_file.compress(self._dump_walls(), flags))
+    # ----------------------------------------------- #
+
+
+    # Carica un labirinto salvato con save().
+    # Ritorna una nuova griglia della classe su cui è chiamato (Grid, PackedGrid, ...).
+    @classmethod
+    def load(cls, path):
+
+        with open(path, "rb") as f:
+            flags, rows, columns = maze_file.unpack_header(f.read(maze_file.HEADER.size))
+            walls = maze_file.decompress(f.read(), flags)
+
+        if len(walls) != rows * columns:
+            raise ValueError(f"Il file {path} non contiene {rows}x{columns} celle")
+
+        grid = cls(rows, columns)
+        grid._load_walls(walls)
+
+        return grid
+    # ----------------------------------------------- #
+
+
     # Stampa il labirinto
     def to_png(self,
                cell_size=10,
@@ -183,6 +535,11 @@ class Grid:
                 current_font = font_default
 
 
+        # Con un ArrayDistances leggo le distanze direttamente dall'array (-1 = non raggiunta)
+        distance_values = None
+        if isinstance(self.distances, ArrayDistances):
+            distance_values = self.distances.values()
+
         # Itero ogni cella e ne calcolo il colore
         for cell in self.each_cell():
 
@@ -199,7 +556,11 @@ class Grid:
             # come un gradiente tra due colori
             if self.distances:
 
-                dist = self.distances[cell]
+                if distance_values is not None:
+                    dist = distance_values[cell.row * self.columns + cell.column]
+                    dist = dist if dist >= 0 else None
+                else:
+                    dist = self.distances[cell]
 
                 if dist is not None and self._maxdistance > 0:
 
@@ -0,0 +1,266 @@
+import heapq  # coda di priorità (min-heap)
+from array import array
+
+
+# Grafo compresso dei corridoi.
+# In un labirinto la maggior parte delle celle ha esattamente due celle collegate:
+# sono celle di corridoio, in cui non c'è nessuna scelta da fare.
+# Il grafo tiene come nodi solamente incroci e vicoli ciechi (celle con grado diverso da 2)
+# e sostituisce ogni corridoio con un unico arco pesato (peso = numero di passi),
+# ricordando le celle attraversate per poter ricostruire il cammino completo.
+# Le ricerche lavorano quindi su un grafo molto più piccolo della griglia
+# e il percorso cella per cella viene espanso solamente alla fine.
+class JunctionGraph:
+
+    def __init__(self, grid):
+
+        self.grid = grid
+
+        size = grid.size()
+        linked_indices = grid._linked_indices
+
+        # Arco (corridoio) a cui appartiene ogni cella interna e posizione lungo l'arco:
+        # le celle-nodo hanno arco -1.
+        corridor = array("i", [-1]) * size
+        offset = array("i", [0]) * size
+
+        # Ogni arco è (nodo u, nodo v, celle interne da u verso v)
+        edges = []
+
+        # Archi uscenti da ogni nodo: (nodo adiacente, peso, arco)
+        adjacency = {}
+
+        for index in range(size):
+            if len(linked_indices(index)) != 2:
+                adjacency[index] = []
+
+        self._corridor = corridor
+        self._offset = offset
+        self._edges = edges
+        self._adjacency = adjacency
+
+        for node in list(adjacency):
+            self._walk_corridors(node)
+
+        # Componenti formate solo da un anello di celle di grado 2:
+        # una cella qualsiasi dell'anello diventa nodo.
+        for index in range(size):
+            if corridor[index] < 0 and index not in adjacency:
+                adjacency[index] = []
+                self._walk_corridors(index)
+    # ----------------------------------------------- #
+
+
+    # Percorre ogni corridoio che parte dal nodo node e lo aggiunge come arco
+    # (se non è già stato percorso partendo dall'altro estremo).
+    def _walk_corridors(self, node):
+
+        linked_indices = self.grid._linked_indices
+        adjacency = self._adjacency
+        corridor = self._corridor
+        offset = self._offset
+        edges = self._edges
+
+        for first in linked_indices(node):
+
+            # Due nodi adiacenti: arco senza celle interne, aggiunto una volta sola
+            if first in adjacency:
+                if node < first:
+                    self._add_edge(node, first, array("i"))
+                continue
+
+            # Corridoio già percorso dall'altro estremo
+            if corridor[first] >= 0:
+                continue
+
+            edge = len(edges)
+            cells = array("i")
+            previous, current = node, first
+
+            while current not in adjacency:
+
+                cells.append(current)
+                corridor[current] = edge
+                offset[current] = len(cells)
+
+                # La cella di corridoio ha due collegamenti: proseguo su quello da cui non arrivo
+                a, b = linked_indices(current)
+                previous, current = current, (b if a == previous else a)
+
+            self._add_edge(node, current, cells)
+    # ----------------------------------------------- #
+
+
+    # Aggiunge l'arco u - v con le celle interne cells (in ordine da u verso v)
+    def _add_edge(self, u, v, cells):
+
+        edge = len(self._edges)
+        weight = len(cells) + 1
+
+        self._edges.append((u, v, cells))
+        self._adjacency[u].append((v, weight, edge))
+
+        if u != v:
+            self._adjacency[v].append((u, weight, edge))
+    # ----------------------------------------------- #
+
+
+    # Numero di nodi (incroci e vicoli ciechi) del grafo compresso
+    def node_count(self):
+        return len(self._adjacency)
+    # ----------------------------------------------- #
+
+
+    # Numero di archi (corridoi) del grafo compresso
+    def edge_count(self):
+        return len(self._edges)
+    # ----------------------------------------------- #
+
+
+    # Ritorna i nodi da cui può partire (o arrivare) una ricerca per la cella index:
+    # dizionario nodo -> (passi, celle attraversate da index al nodo, nodo escluso).
+    def _attachments(self, index):
+
+        edge = self._corridor[index]
+
+        if edge < 0:
+            return {index: (0, [])}
+
+        u, v, cells = self._edges[edge]
+        position = self._offset[index]
+
+        to_u = (position, cells[position - 1::-1].tolist())
+        to_v = (len(cells) + 1 - position, cells[position - 1:].tolist())
+
+        # In un anello u == v: tengo il lato più corto
+        if u == v:
+            return {u: min(to_u, to_v)}
+
+        return {u: to_u, v: to_v}
+    # ----------------------------------------------- #
+
+
+    # Celle interne dell'arco edge percorse partendo dal nodo start
+    def _corridor_cells(self, edge, start):
+
+        u, v, cells = self._edges[edge]
+
+        if start == u:
+            return cells.tolist()
+
+        return cells[::-1].tolist()
+    # ----------------------------------------------- #
+
+
+    # Ricerca A* sul grafo compresso tra gli indici source e target.
+    # La distanza di Manhattan resta ammissibile: un corridoio non è mai
+    # più corto della distanza di Manhattan tra i suoi estremi.
+    # Ritorna la lista degli indici del cammino, oppure None se non esiste.
+    def _search(self, source, target):
+
+        columns = self.grid.columns
+        target_row, target_column = divmod(target, columns)
+
+        def heuristic(index):
+            row, column = divmod(index, columns)
+            return abs(row - target_row) + abs(column - target_column)
+
+        starts = self._attachments(source)
+        ends = self._attachments(target)
+
+        infinity = float('inf')
+        best, best_node = infinity, None
+
+        # Entrambe le celle nello stesso corridoio: cammino diretto lungo il corridoio
+        edge = self._corridor[source]
+        if edge >= 0 and edge == self._corridor[target]:
+            cells = self._edges[edge][2]
+            a, b = self._offset[source] - 1, self._offset[target] - 1
+            best = abs(a - b)
+            direct = cells[a:b + 1] if a <= b else cells[b:a + 1][::-1]
+
+        g_score = {}
+        came_from = {}
+        open_set = []
+
+        for node, (steps, _) in starts.items():
+            g_score[node] = steps
+            came_from[node] = None
+            heapq.heappush(open_set, (steps + heuristic(node), node))
+
+        while open_set:
+
+            current_f_score, current = heapq.heappop(open_set)
+
+            # Nessun cammino ancora da esplorare può essere più corto del migliore
+            if current_f_score >= best:
+                break
+
+            current_g_score = g_score[current]
+
+            # Elemento superato da un percorso migliore, lo ignoro
+            if current_f_score > current_g_score + heuristic(current):
+                continue
+
+            if current in ends and current_g_score + ends[current][0] < best:
+                best = current_g_score + ends[current][0]
+                best_node = current
+
+            for neighbor, weight, edge in self._adjacency[current]:
+
+                neighbor_g_score = current_g_score + weight
+
+                if neighbor_g_score < g_score.get(neighbor, infinity):
+                    g_score[neighbor] = neighbor_g_score
+                    came_from[neighbor] = (current, edge)
+                    heapq.heappush(open_set, (neighbor_g_score + heuristic(neighbor), neighbor))
+
+        if best == infinity:
+            return None
+
+        if best_node is None:
+            return direct.tolist()
+
+        # Espando il cammino: nodi del grafo compresso con i corridoi in mezzo
+        hops = []
+        node = best_node
+        while came_from[node] is not None:
+            previous, edge = came_from[node]
+            hops.append((previous, edge, node))
+            node = previous
+
+        path = starts[node][1]
+        for previous, edge, node in reversed(hops):
+            path.append(previous)
+            path.extend(self._corridor_cells(edge, previous))
+
+        path.append(best_node)
+        path.extend(reversed(ends[best_node][1]))
+
+        return path
+    # ----------------------------------------------- #
+
+
+    # Ritorna il cammino minimo (lista di celle) da cell ad another_cell,
+    # oppure una lista vuota se non sono collegate (come AStar.apply).
+    def path(self, cell, another_cell):
+
+        grid = self.grid
+        columns = grid.columns
+
+        path = self._search(cell.row * columns + cell.column,
+                            another_cell.row * columns + another_cell.column)
+
+        if path is None:
+            return []
+
+        return [grid._cell(index) for index in path]
+    # ----------------------------------------------- #
+
+
+    # Ritorna la distanza tra due celle, oppure None se non sono collegate
+    def distance(self, cell, another_cell):
+
+        path = self.path(cell, another_cell)
+        return len(path) - 1 if path else None
+    # ----------------------------------------------- #
@@ -0,0 +1,144 @@
+from array import array
+
+from cell import EAST, SOUTH
+from rng import resolve
+
+
+# Insiemi disgiunti (union-find) su interi 0..size-1, salvati in array compatti.
+# find usa la compressione dei cammini (path halving),
+# union unisce l'albero più basso sotto quello più alto (union by rank).
+class DisjointSet:
+
+    def __init__(self, size):
+
+        self._parent = array("i", range(size))
+        self._rank = bytearray(size)
+    # ----------------------------------------------- #
+
+
+    # Ritorna il rappresentante dell'insieme di item
+    def find(self, item):
+
+        parent = self._parent
+
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+
+        return item
+    # ----------------------------------------------- #
+
+
+    # Unisce gli insiemi di item e other.
+    # Ritorna False se erano già lo stesso insieme.
+    def union(self, item, other):
+
+        root, other_root = self.find(item), self.find(other)
+
+        if root == other_root:
+            return False
+
+        rank = self._rank
+
+        if rank[root] < rank[other_root]:
+            root, other_root = other_root, root
+
+        self._parent[other_root] = root
+
+        if rank[root] == rank[other_root]:
+            rank[root] += 1
+
+        return True
+    # ----------------------------------------------- #
+
+
+
+# Algoritmo di generazione di Kruskal (randomizzato).
+# Ogni cella parte come insieme a sé. Si considerano tutti i muri interni
+# in ordine casuale: se le due celle separate dal muro sono in insiemi diversi,
+# il muro viene rimosso e i due insiemi vengono uniti.
+# Alla fine resta un solo insieme, cioè un labirinto perfetto.
+#
+# Ogni muro è un intero: (indice della cella) * 2 + 0 per il muro a est, + 1 per quello a sud.
+class Kruskal:
+
+    @staticmethod
+    def apply(grid, rng=None):
+
+        rng = resolve(rng)
+
+        # Mescolo tutti i muri in una volta sola
+        edges = Kruskal.edges(grid.rows, grid.columns).tolist()
+        rng.shuffle(edges)
+
+        return Kruskal.apply_edges(grid, edges)
+    # ----------------------------------------------- #
+
+
+    # Ritorna l'array di tutti i muri interni di una griglia (rows x columns)
+    @staticmethod
+    def edges(rows, columns):
+
+        edges = array("i")
+
+        # Muri a est: tutte le celle tranne l'ultima colonna, una riga alla volta
+        for row in range(rows):
+            start = row * columns * 2
+            edges.extend(range(start, start + (columns - 1) * 2, 2))
+
+        # Muri a sud: tutte le celle tranne l'ultima riga
+        edges.extend(range(1, (rows - 1) * columns * 2, 2))
+
+        return edges
+    # ----------------------------------------------- #
+
+
+    # Versione a blocchi: rimuove i muri nell'ordine in cui compaiono in edges
+    # (per esempio un array già mescolato, anche da un altro processo).
+    @staticmethod
+    def apply_edges(grid, edges):
+
+        columns = grid.columns
+        size = grid.rows * columns
+
+        sets = DisjointSet(size)
+        remaining = size - 1  # passaggi che servono per collegare tutte le celle
+
+        # find e union di DisjointSet scritti direttamente nel ciclo,
+        # per evitare due chiamate di metodo per ogni muro
+        parent, rank = sets._parent, sets._rank
+
+        with grid._writable_walls() as walls:
+
+            for edge in edges:
+
+                if not remaining:
+                    break
+
+                index = edge >> 1
+                other = index + columns if edge & 1 else index + 1
+
+                while parent[index] != index:
+                    parent[index] = parent[parent[index]]
+                    index = parent[index]
+
+                while parent[other] != other:
+                    parent[other] = parent[parent[other]]
+                    other = parent[other]
+
+                if index == other:
+                    continue
+
+                if rank[index] < rank[other]:
+                    index, other = other, index
+
+                parent[other] = index
+
+                if rank[index] == rank[other]:
+                    rank[index] += 1
+
+                walls[edge >> 1] |= SOUTH if edge & 1 else EAST
+                remaining -= 1
+
+        return grid
+    # ----------------------------------------------- #
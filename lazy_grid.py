@@ -0,0 +1,135 @@
+from cell import Cell, EAST, SOUTH
+from grid import Grid
+
+
+# Cella di una LazyGrid.
+# Le celle adiacenti (north, south, east, west) non vengono salvate
+# ma calcolate ad ogni accesso chiedendole alla griglia:
+# in questo modo vengono create solamente le celle effettivamente visitate.
+class LazyCell(Cell):
+
+    __slots__ = ("_grid",)
+
+    # Non chiamo Cell.__init__: gli adiacenti sono proprietà in sola lettura
+    def __init__(self, grid, r, c):
+
+        self._grid = grid
+        self.row = r
+        self.column = c
+
+        self._links = 0
+        self._hash = hash((r, c))
+    # ----------------------------------------------- #
+
+
+    # Celle adiacenti, calcolate al momento (None se fuori dalla griglia)
+    @property
+    def north(self):
+        return self._grid[self.row - 1, self.column]
+
+    @property
+    def south(self):
+        return self._grid[self.row + 1, self.column]
+
+    @property
+    def east(self):
+        return self._grid[self.row, self.column + 1]
+
+    @property
+    def west(self):
+        return self._grid[self.row, self.column - 1]
+    # ----------------------------------------------- #
+
+
+    # Ricavo la direzione dalle coordinate, senza creare le celle adiacenti
+    def _direction(self, another_cell):
+        return self._position_direction(another_cell)
+    # ----------------------------------------------- #
+
+
+
+# Griglia con costruzione "pigra".
+# Il costruttore non crea nessuna cella: ogni cella viene creata al primo accesso
+# tramite __getitem__, each_row o each_cell e poi riutilizzata.
+# Utile per griglie molto grandi in cui si lavora solamente su una regione
+# (per esempio una ricerca A* tra due celle vicine).
+class LazyGrid(Grid):
+
+    # Controllo il riferimento alla griglia, senza creare la cella in (row, column)
+    def _owns(self, cell):
+        return getattr(cell, "_grid", None) is self
+    # ----------------------------------------------- #
+
+
+    # Le celle già create, indicizzate per (row * columns + column)
+    def _create_grid(self):
+        return {}
+    # ----------------------------------------------- #
+
+
+    # Gli adiacenti sono calcolati al momento da LazyCell
+    def _configure_cells(self):
+        pass
+    # ----------------------------------------------- #
+
+
+    # Ritorna la cella in posizione (row, column) creandola se necessario,
+    # oppure None se fuori dal range della griglia.
+    def __getitem__(self, position):
+
+        row, column = position
+
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+
+            index = row * self.columns + column
+            cell = self._grid.get(index)
+
+            if cell is None:
+                cell = self._grid[index] = LazyCell(self, row, column)
+
+            return cell
+
+        return None
+    # ----------------------------------------------- #
+
+
+    # Ritorna le righe della griglia una alla volta (creando le celle della riga)
+    def each_row(self):
+        for row in range(self.rows):
+            yield [self[row, col] for col in range(self.columns)]
+    # ----------------------------------------------- #
+
+
+    # Ritorna il numero di celle effettivamente create
+    def materialized(self):
+        return len(self._grid)
+    # ----------------------------------------------- #
+
+
+    # Solo le celle già create possono avere dei collegamenti
+    def deadends(self):
+
+        deadends = []
+
+        for index in sorted(self._grid):
+
+            cell = self._grid[index]
+
+            if len(cell.all_linked()) == 1:
+                deadends.append(cell)
+
+        return deadends
+    # ----------------------------------------------- #
+
+
+    # Solo le celle già create possono avere dei collegamenti:
+    # le altre restano a zero senza doverle creare.
+    def _dump_walls(self):
+
+        walls = bytearray(self.size())
+
+        for index, cell in self._grid.items():
+            walls[index] = cell._links & (EAST | SOUTH)
+
+        return walls
+    # ----------------------------------------------- #
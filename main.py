@@ -53,16 +53,14 @@ def main():
 
 
     # ----------------------------------------------- #
-    # Calcolo percorso più lungo dalla radice.
+    # Calcolo percorso più lungo (diametro del labirinto) con una sola visita
     start_time = time.perf_counter()
-    longest_path_root, _ = maze_distances.longest_path_from()
-    distances_from_longest_path_root = longest_path_root.calc_all_distances()
+    longest_path_root, longest_path_goal, max_dist_longest_path, longest_path, _ = MazeGrid.diameter()
 
-    # Calcolo percorso più lungo dalla nuova radice
-    longest_path_goal, max_dist_longest_path = distances_from_longest_path_root.longest_path_from()
-
-    # Calcolo il percorso più corto tra le due celle
-    longest_path_distances = distances_from_longest_path_root.shortest_path_to(longest_path_goal)
+    # Distanze lungo il percorso più lungo, per colorarlo
+    longest_path_distances = Distances(longest_path_root)
+    for distance, cell in enumerate(longest_path):
+        longest_path_distances[cell] = distance
     end_time = time.perf_counter()
 
     execution_time = end_time - start_time
@@ -166,7 +164,6 @@ def main():
     img_longest_path_distances.show()
 
 
-    longest_path = AStar.apply(MazeGrid, longest_path_root, longest_path_goal)
     # Percorso più lungo (colorato con percorso)
     img_longest_path_solution = MazeGrid.to_png(cell_size,
                                                 background_type="plain_white",
@@ -181,7 +178,7 @@ def main():
 
 def print_cells(grid):
     for cell in grid.each_cell():
-        print(cell, "linked to:", list(cell._links))
+        print(cell, "linked to:", cell.all_linked())
 
 
 # Copia i collegamenti del labirinto (links) dalla griglia source a quella di target.
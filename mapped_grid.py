@@ -0,0 +1,105 @@
+import mmap
+import os
+
+import maze_file
+from grid import Grid
+from packed_grid import PackedGrid
+
+
+# Griglia compatta salvata su disco.
+# I bit di passaggio non stanno in un bytearray ma in un file mappato in memoria
+# (formato descritto in maze_file.py): il sistema operativo carica solamente
+# le pagine effettivamente toccate, quindi la griglia può essere più grande della RAM.
+# I generatori che lavorano su una finestra locale (BinaryTree, Sidewinder,
+# RecursiveDivision) scrivono direttamente nel file tramite le viste PackedCell.
+#
+# Uso:
+#   MappedGrid(path, rows, columns)  crea un nuovo labirinto vuoto su file
+#   MappedGrid.open(path)            riapre un labirinto già salvato (istantaneo)
+class MappedGrid(PackedGrid):
+
+    # Costruttore:
+    # se rows e columns sono indicati creo un nuovo file (sovrascrivendo quello esistente),
+    # altrimenti leggo la dimensione dall'header del file esistente.
+    def __init__(self, path, rows=None, columns=None):
+
+        self.path = path
+
+        if rows is None or columns is None:
+
+            with open(path, "rb") as f:
+                flags, rows, columns = maze_file.unpack_header(f.read(maze_file.HEADER.size))
+
+            if flags:
+                raise ValueError(f"Il labirinto {path} è compresso e non può essere mappato")
+
+            # Come Grid.load: il file deve contenere esattamente rows x columns celle
+            if os.path.getsize(path) != maze_file.HEADER.size + rows * columns:
+                raise ValueError(f"Il file {path} non contiene {rows}x{columns} celle")
+
+        else:
+
+            with open(path, "wb") as f:
+                f.write(maze_file.pack_header(rows, columns))
+                f.truncate(maze_file.HEADER.size + rows * columns)
+
+        super().__init__(rows, columns)
+    # ----------------------------------------------- #
+
+
+    # Riapre un labirinto salvato su file
+    @classmethod
+    def open(cls, path):
+        return cls(path)
+    # ----------------------------------------------- #
+
+
+    # Grid.load costruisce la griglia con cls(rows, columns), che qui non ha senso
+    # (il primo parametro è il percorso del file): il file salvato viene mappato direttamente.
+    @classmethod
+    def load(cls, path):
+        return cls.open(path)
+    # ----------------------------------------------- #
+
+
+    # La BFS di PackedGrid decodifica in blocco tutto il file:
+    # uso quella per cella, che tocca solamente le pagine delle celle visitate
+    calc_distances = Grid.calc_distances
+    # ----------------------------------------------- #
+
+
+    # Mappo il file in memoria e ritorno la vista dei soli dati (header escluso)
+    def _create_grid(self):
+
+        self._file = open(self.path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+        return memoryview(self._mmap)[maze_file.HEADER.size:]
+    # ----------------------------------------------- #
+
+
+    # Scrive su disco le pagine modificate
+    def flush(self):
+        self._mmap.flush()
+    # ----------------------------------------------- #
+
+
+    # Chiude il file: la griglia non è più utilizzabile
+    def close(self):
+
+        if self._mmap.closed:
+            return
+
+        self._mmap.flush()
+        self._grid.release()  # la vista deve essere rilasciata prima di chiudere la mappa
+        self._mmap.close()
+        self._file.close()
+    # ----------------------------------------------- #
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    # ----------------------------------------------- #
@@ -0,0 +1,167 @@
+import lzma
+import os
+import struct
+import zlib
+
+
+# Formato binario di un labirinto salvato su file.
+#
+# Header (16 byte, little-endian):
+#   offset 0   4 byte   magic     b"ARDN"
+#   offset 4   uint16   version   versione del formato (attualmente 1)
+#   offset 6   uint16   flags     compressione dei dati: 0 = nessuna, 1 = zlib, 2 = lzma
+#   offset 8   uint32   rows      numero di righe
+#   offset 12  uint32   columns   numero di colonne
+#
+# Dati (rows x columns byte, subito dopo l'header):
+#   un byte per cella, in ordine di riga (indice = row * columns + column).
+#   Ogni byte contiene i bit di passaggio della cella:
+#     bit 0 (EAST)  = passaggio verso la cella a est
+#     bit 1 (SOUTH) = passaggio verso la cella a sud
+#   I passaggi verso nord e ovest sono quelli SOUTH/EAST delle celle adiacenti.
+#
+# Essendo i dati a dimensione fissa, un file non compresso può essere
+# mappato direttamente in memoria (vedi MappedGrid) senza doverlo leggere.
+#
+# Le distanze (vedi Distances.save) usano lo stesso header con magic b"ARDD",
+# seguito da row e column della root (2 x uint32) e da un array di
+# (rows x columns) interi int32 little-endian, con -1 per le celle non raggiunte.
+
+MAGIC = b"ARDN"
+DISTANCES_MAGIC = b"ARDD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+ROOT = struct.Struct("<II")
+
+# Valore del campo flags per ogni tipo di compressione
+COMPRESSIONS = {None: 0, "zlib": 1, "lzma": 2}
+
+# Bit 1 di ogni cella (passaggio SOUTH, vedi sopra)
+SOUTH_BIT = 0b0010
+
+
+# Crea l'header per un labirinto di dimensione (rows x columns)
+def pack_header(rows, columns, flags=0, magic=MAGIC):
+    return HEADER.pack(magic, VERSION, flags, rows, columns)
+# ----------------------------------------------- #
+
+
+# Legge l'header e ritorna la tupla (flags, rows, columns).
+# Solleva ValueError se i dati non sono un labirinto in formato valido.
+def unpack_header(data, magic=MAGIC):
+
+    if len(data) < HEADER.size:
+        raise ValueError("Header del labirinto troncato")
+
+    file_magic, version, flags, rows, columns = HEADER.unpack_from(data)
+
+    if file_magic != magic:
+        raise ValueError("Il file non contiene un labirinto (magic non valido)")
+
+    if version != VERSION:
+        raise ValueError(f"Versione del formato non supportata: {version}")
+
+    return flags, rows, columns
+# ----------------------------------------------- #
+
+
+# Ritorna il valore di flags corrispondente alla compressione richiesta
+def compression_flags(compression):
+
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compressione non supportata: {compression}")
+
+    return COMPRESSIONS[compression]
+# ----------------------------------------------- #
+
+
+# Comprime i dati secondo il valore di flags
+def compress(data, flags):
+
+    if flags == COMPRESSIONS["zlib"]:
+        return zlib.compress(data)
+
+    if flags == COMPRESSIONS["lzma"]:
+        return lzma.compress(data)
+
+    return bytes(data)
+# ----------------------------------------------- #
+
+
+# Decomprime i dati secondo il valore di flags letto dall'header
+def decompress(data, flags):
+
+    if flags == COMPRESSIONS["zlib"]:
+        return zlib.decompress(data)
+
+    if flags == COMPRESSIONS["lzma"]:
+        return lzma.decompress(data)
+
+    if flags:
+        raise ValueError(f"Compressione sconosciuta: {flags}")
+
+    return data
+# ----------------------------------------------- #
+
+
+# Scrive su file (non compresso) un labirinto largo columns a partire
+# dalle sue righe, senza tenere in memoria tutto il labirinto.
+# records è un iterabile di righe di columns byte (per esempio Eller.rows):
+# il numero di righe viene scritto nell'header alla fine.
+# Se rows è indicato vengono scritte al più rows righe: l'ultima viene chiesta
+# con records.send(True) quando records lo permette (vedi Eller.rows), così un
+# generatore infinito può chiudere il labirinto (da almeno due righe: send non
+# può essere la prima richiesta a un generatore).
+# L'ultima riga non può avere passaggi SOUTH (porterebbero fuori dal labirinto):
+# in quel caso il file viene eliminato e viene sollevato ValueError.
+# Ritorna il numero di righe scritte.
+def write_rows(path, columns, records, rows=None):
+
+    records = iter(records)
+    count = 0       # righe lette
+    last = None     # ultima riga letta, scritta solo dopo aver letto la successiva
+
+    try:
+        with open(path, "wb") as f:
+
+            f.write(pack_header(0, columns))
+
+            while rows is None or count < rows:
+
+                # La riga di chiusura non può essere la prima (il generatore non è ancora partito)
+                closing = rows is not None and 0 < count == rows - 1
+
+                try:
+                    if closing and hasattr(records, "send"):
+                        record = records.send(True)
+                    else:
+                        record = next(records)
+                except StopIteration:
+                    break
+
+                if len(record) != columns:
+                    raise ValueError(f"La riga {count} non ha {columns} celle")
+
+                if last is not None:
+                    f.write(last)
+
+                last = record
+                count += 1
+
+            if last is not None:
+
+                if any(bits & SOUTH_BIT for bits in last):
+                    raise ValueError(f"L'ultima riga ({count - 1}) ha passaggi SOUTH: "
+                                     f"il labirinto non è chiuso")
+
+                f.write(last)
+
+            f.seek(0)
+            f.write(pack_header(count, columns))
+
+    except ValueError:
+        os.remove(path)  # non lascio un file incompleto
+        raise
+
+    return count
+# ----------------------------------------------- #
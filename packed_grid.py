@@ -0,0 +1,437 @@
+from array import array
+
+from cell import Cell, EAST, SOUTH, NORTH, WEST, link_listeners
+from distances import ArrayDistances
+from grid import Grid
+
+
+# Bit di passaggio salvati per ogni cella della griglia compatta (EAST, SOUTH).
+# Ogni cella possiede solamente i passaggi verso EST e verso SUD:
+# il passaggio verso NORD di una cella è il passaggio SUD della cella sopra,
+# il passaggio verso OVEST è il passaggio EST della cella a sinistra.
+
+# Tabelle di traduzione per ricavare in blocco i passaggi NORD/OVEST
+# dai passaggi SUD/EST delle celle vicine (vedi PackedGrid._link_masks).
+_NORTH_FROM_SOUTH = bytes(NORTH if byte & SOUTH else 0 for byte in range(256))
+_WEST_FROM_EAST = bytes(WEST if byte & EAST else 0 for byte in range(256))
+
+
+# Vista leggera di una cella di una PackedGrid.
+# Non contiene collegamenti né puntatori alle celle adiacenti:
+# tutto viene calcolato al volo a partire dall'indice (row * columns + column)
+# e dai bit di passaggio salvati nella griglia.
+# Espone la stessa interfaccia di Cell, quindi generatori, A* e analyzer
+# possono usarla senza modifiche.
+class PackedCell:
+
+    __slots__ = ("_grid", "row", "column", "index")
+
+    def __init__(self, grid, r, c):
+
+        self._grid = grid
+        self.row = r
+        self.column = c
+        self.index = r * grid.columns + c
+    # ----------------------------------------------- #
+
+
+    # Celle adiacenti, calcolate dagli indici (None se fuori dalla griglia)
+    @property
+    def north(self):
+        return self._grid[self.row - 1, self.column]
+
+    @property
+    def south(self):
+        return self._grid[self.row + 1, self.column]
+
+    @property
+    def east(self):
+        return self._grid[self.row, self.column + 1]
+
+    @property
+    def west(self):
+        return self._grid[self.row, self.column - 1]
+    # ----------------------------------------------- #
+
+
+    # Collega la cella corrente ad another_cell.
+    # Il passaggio è salvato una sola volta nella griglia, quindi è sempre bidirezionale:
+    # il parametro bidirectional è mantenuto solo per compatibilità con Cell.
+    def link(self, another_cell, bidirectional=True):
+
+        self._grid._set_passage(self, another_cell, True)
+
+        for listener in link_listeners:
+            listener(self, another_cell, True)
+
+        return self
+    # ----------------------------------------------- #
+
+
+    # Scollega la cella corrente da another_cell (sempre bidirezionale, vedi link)
+    def unlink(self, another_cell, bidirectional=True):
+
+        self._grid._set_passage(self, another_cell, False)
+
+        for listener in link_listeners:
+            listener(self, another_cell, False)
+
+        return self
+    # ----------------------------------------------- #
+
+
+    # Ritorna tutte le celle collegate alla cella corrente
+    def all_linked(self):
+        grid = self._grid
+        return [grid._cell(index) for index in grid._linked_indices(self.index)]
+    # ----------------------------------------------- #
+
+
+    # Ritorna true se la cella corrente è collegata ad un'altra cella
+    def is_linked(self, another_cell):
+
+        if another_cell is None:
+            return False
+
+        return self._grid._is_passage(self, another_cell)
+    # ----------------------------------------------- #
+
+
+    # Restituisce tutte le celle adiacenti (quindi non per forza collegate)
+    def all_neighbors(self):
+
+        neighbors = []
+
+        if self.row > 0:
+            neighbors.append(self.north)
+
+        if self.row < self._grid.rows - 1:
+            neighbors.append(self.south)
+
+        if self.column < self._grid.columns - 1:
+            neighbors.append(self.east)
+
+        if self.column > 0:
+            neighbors.append(self.west)
+
+        return neighbors
+    # ----------------------------------------------- #
+
+
+    # Stessa BFS di Cell: lavora solamente tramite all_linked()
+    calc_all_distances = Cell.calc_all_distances
+    # ----------------------------------------------- #
+
+
+    # L'indice identifica univocamente la cella all'interno della griglia
+    def __hash__(self):
+        return self.index
+    # ----------------------------------------------- #
+
+
+    # Due viste sono uguali se indicano la stessa posizione della stessa griglia
+    def __eq__(self, other):
+        return (isinstance(other, PackedCell) and
+                (self.index == other.index) and
+                (self._grid is other._grid))
+    # ----------------------------------------------- #
+
+    # Rappresento la cella in formato leggibile
+    def __str__(self):
+        return f"({self.row}, {self.column})"
+    # ----------------------------------------------- #
+
+    # Rappresento la cella per debugging
+    def __repr__(self):
+        return f"({self.row}, {self.column})"
+    # ----------------------------------------------- #
+
+
+
+# Griglia compatta: invece di un oggetto Cell per ogni posizione
+# salva il labirinto in un bytearray di (rows x columns) byte,
+# dove ogni byte contiene i bit di passaggio EAST/SOUTH della cella.
+# Le celle restituite da __getitem__, each_row ed each_cell sono viste
+# PackedCell create al momento, quindi la memoria occupata è di circa
+# un byte per cella (contro le centinaia di byte di Cell).
+class PackedGrid(Grid):
+
+    # Creo il labirinto vuoto: nessun passaggio aperto
+    def _create_grid(self):
+        return bytearray(self.rows * self.columns)
+    # ----------------------------------------------- #
+
+
+    # Gli adiacenti sono calcolati dagli indici, non serve configurarli
+    def _configure_cells(self):
+        pass
+    # ----------------------------------------------- #
+
+
+    # Ritorna la vista della cella in posizione (row, column),
+    # oppure None se fuori dal range della griglia.
+    def __getitem__(self, position):
+
+        row, column = position
+
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return PackedCell(self, row, column)
+
+        return None
+    # ----------------------------------------------- #
+
+
+    # Ritorna le righe della griglia una alla volta
+    def each_row(self):
+        for row in range(self.rows):
+            yield [PackedCell(self, row, col) for col in range(self.columns)]
+    # ----------------------------------------------- #
+
+
+    # Ritorna la vista della cella di indice index
+    def _cell(self, index):
+        row, column = divmod(index, self.columns)
+        return PackedCell(self, row, column)
+    # ----------------------------------------------- #
+
+
+    # Legge i bit di passaggio della cella di indice index
+    def _bits(self, index):
+        return self._grid[index]
+    # ----------------------------------------------- #
+
+
+    # Scrive i bit di passaggio della cella di indice index
+    def _set_bits(self, index, bits):
+        self._grid[index] = bits
+    # ----------------------------------------------- #
+
+
+    # Ritorna la coppia (indice, bit) che rappresenta il passaggio tra due celle adiacenti.
+    # Il passaggio appartiene sempre alla cella più a nord o più a ovest.
+    def _edge(self, cell, another_cell):
+
+        dr = another_cell.row - cell.row
+        dc = another_cell.column - cell.column
+
+        if dr == 0 and dc == 1:
+            return cell.index, EAST
+        if dr == 0 and dc == -1:
+            return another_cell.index, EAST
+        if dr == 1 and dc == 0:
+            return cell.index, SOUTH
+        if dr == -1 and dc == 0:
+            return another_cell.index, SOUTH
+
+        raise ValueError(f"Le celle {cell} e {another_cell} non sono adiacenti")
+    # ----------------------------------------------- #
+
+
+    # Apre (value = True) o chiude (value = False) il passaggio tra due celle adiacenti
+    def _set_passage(self, cell, another_cell, value):
+
+        index, bit = self._edge(cell, another_cell)
+
+        if value:
+            self._set_bits(index, self._bits(index) | bit)
+        else:
+            self._set_bits(index, self._bits(index) & ~bit)
+    # ----------------------------------------------- #
+
+
+    # Ritorna true se esiste un passaggio tra due celle
+    def _is_passage(self, cell, another_cell):
+
+        dr = another_cell.row - cell.row
+        dc = another_cell.column - cell.column
+
+        # Celle non adiacenti non possono essere collegate
+        if abs(dr) + abs(dc) != 1:
+            return False
+
+        index, bit = self._edge(cell, another_cell)
+        return bool(self._bits(index) & bit)
+    # ----------------------------------------------- #
+
+
+    # Ritorna gli indici delle celle collegate alla cella di indice index
+    # (nell'ordine nord, sud, est, ovest).
+    def _linked_indices(self, index):
+
+        columns = self.columns
+        bits = self._bits(index)
+        linked = []
+
+        if index >= columns and self._bits(index - columns) & SOUTH:
+            linked.append(index - columns)
+
+        if bits & SOUTH:
+            linked.append(index + columns)
+
+        if bits & EAST:
+            linked.append(index + 1)
+
+        if index % columns and self._bits(index - 1) & EAST:
+            linked.append(index - 1)
+
+        return linked
+    # ----------------------------------------------- #
+
+
+    # I bit di passaggio sono già nel formato su file
+    def _dump_walls(self):
+        return bytes(self._grid)
+    # ----------------------------------------------- #
+
+
+    # Sostituisce in blocco i bit di passaggio di tutta la griglia
+    def _load_walls(self, walls):
+        self._grid[:] = walls
+    # ----------------------------------------------- #
+
+
+    # Sostituisce i bit di passaggio delle righe consecutive a partire da row
+    # (walls contiene un numero intero di righe, in ordine di riga)
+    def _load_rows(self, row, walls):
+
+        start = row * self.columns
+        self._grid[start:start + len(walls)] = walls
+    # ----------------------------------------------- #
+
+
+    # Divide le righe della griglia in blocchi [start, stop) di circa block_cells celle,
+    # così i generatori a blocchi usano memoria proporzionale al blocco e non alla griglia
+    def _row_blocks(self, block_cells=1 << 16):
+
+        step = max(1, block_cells // self.columns)
+
+        for start in range(0, self.rows, step):
+            yield start, min(self.rows, start + step)
+    # ----------------------------------------------- #
+
+
+    # Scrive la griglia un blocco di righe alla volta a partire dalla prima riga.
+    # Ogni blocco è una coppia (east, north) di bytes in ordine di riga:
+    # i bit EAST di ogni cella e il bit SOUTH da scrivere nella cella sopra
+    # per ogni taglio a nord (quelli della prima riga della griglia vengono ignorati).
+    # Il taglio a nord della prima riga di un blocco finisce nell'ultima riga
+    # del blocco precedente, che resta quindi in sospeso fino al blocco successivo.
+    def _load_row_blocks(self, blocks):
+
+        columns = self.columns
+        row = 0
+        pending = b""   # bit EAST dell'ultima riga letta, in attesa dei tagli a nord della riga sotto
+
+        for east, north in blocks:
+
+            if not pending:
+                north = north[columns:]
+
+            east = pending + east
+            pending = east[-columns:]
+            east = east[:-columns]
+
+            # EAST e SOUTH sono bit diversi, li unisco con un unico OR sugli interi
+            size = len(east)
+            walls = (int.from_bytes(east, "big") | int.from_bytes(north, "big")).to_bytes(size, "big")
+
+            self._load_rows(row, walls)
+            row += size // columns
+
+        # L'ultima riga non ha celle sotto: nessun taglio a nord da aggiungere
+        self._load_rows(row, pending)
+    # ----------------------------------------------- #
+
+
+    # Ritorna il buffer scrivibile con i bit di passaggio di tutta la griglia
+    # (in ordine di riga), oppure None se la griglia non ne ha uno contiguo.
+    # Permette ai generatori di lavorare con slice direttamente sulla griglia.
+    def _walls_buffer(self):
+        return self._grid
+    # ----------------------------------------------- #
+
+
+    # Ritorna la maschera completa dei collegamenti (NORTH, SOUTH, EAST, WEST)
+    # di ogni cella, un byte per cella, calcolata in blocco:
+    # il bit NORTH è il bit SOUTH della cella sopra (spostamento di una riga),
+    # il bit WEST è il bit EAST della cella a sinistra (spostamento di un byte).
+    def _link_masks(self):
+
+        walls = self._dump_walls()
+        size = len(walls)
+        columns = self.columns
+
+        north = bytes(columns) + walls[:size - columns].translate(_NORTH_FROM_SOUTH)
+        west = bytes(1) + walls[:size - 1].translate(_WEST_FROM_EAST)
+
+        masks = (int.from_bytes(walls, "big") |
+                 int.from_bytes(north[:size], "big") |
+                 int.from_bytes(west[:size], "big"))
+
+        return masks.to_bytes(size, "big")
+    # ----------------------------------------------- #
+
+
+    # BFS per livelli sui bit di passaggio.
+    # La frontiera è una lista di indici: per ogni cella la maschera dei collegamenti
+    # (calcolata una sola volta per tutta la griglia, quindi tutta in memoria:
+    # MappedGrid e TiledGrid usano invece la BFS per cella di Grid) seleziona direttamente
+    # gli spostamenti da fare, senza creare viste né liste di celle collegate.
+    # L'array delle distanze fa anche da insieme delle celle visitate (-1 = non visitata).
+    def calc_distances(self, root):
+
+        size = self.rows * self.columns
+        columns = self.columns
+
+        masks = self._link_masks()
+
+        # Spostamenti di indice per ognuna delle 16 maschere possibili
+        moves = [tuple(offset for bit, offset in ((NORTH, -columns), (SOUTH, columns), (EAST, 1), (WEST, -1))
+                       if mask & bit)
+                 for mask in range(16)]
+
+        values = array("i", [-1]) * size
+
+        root_index = root.row * columns + root.column
+        values[root_index] = 0
+
+        frontier = [root_index]
+        distance = 0
+
+        while frontier:
+
+            distance += 1
+            new_frontier = []
+            append = new_frontier.append
+
+            for index in frontier:
+                for offset in moves[masks[index]]:
+                    linked = index + offset
+                    if values[linked] < 0:
+                        values[linked] = distance
+                        append(linked)
+
+            frontier = new_frontier
+
+        return ArrayDistances(root, self, values)
+    # ----------------------------------------------- #
+
+
+    # Le viste non sono uniche: una cella appartiene alla griglia se ne punta il buffer
+    def _owns(self, cell):
+        return getattr(cell, "_grid", None) is self
+    # ----------------------------------------------- #
+
+
+    # Raggruppa i vicoli ciechi contando direttamente i bit di passaggio,
+    # senza passare dalle viste delle celle collegate.
+    def deadends(self):
+
+        deadends = []
+
+        for index in range(self.rows * self.columns):
+            if len(self._linked_indices(index)) == 1:
+                deadends.append(self._cell(index))
+
+        return deadends
+    # ----------------------------------------------- #
@@ -0,0 +1,126 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cell import EAST, SOUTH
+from packed_grid import PackedGrid
+from recursive_division import RecursiveDivision
+from rng import resolve
+
+
+# Generazione parallela di un labirinto molto grande.
+# La griglia viene divisa in tile (blocchi) di tile_size x tile_size celle e ogni tile
+# viene generato come labirinto indipendente da un processo separato.
+# I tile vengono poi "cuciti" tra loro: si sceglie uno spanning tree casuale
+# sul grafo dei tile e, per ogni coppia di tile collegati nell'albero, si apre
+# un solo passaggio casuale sul bordo comune. Essendo ogni tile un albero,
+# anche il labirinto finale è perfetto.
+# RecursiveDivision divide già la griglia in aree indipendenti,
+# quindi in quel caso vengono distribuite ai processi direttamente le sue aree.
+class ParallelGenerator:
+
+    # rng è la sorgente casuale da usare (vedi rng.py), di default il modulo random:
+    # a parità di rng, tile_size e workers il labirinto generato è sempre lo stesso.
+    @staticmethod
+    def apply(grid, generator, tile_size=256, workers=None, rng=None):
+
+        rng = resolve(rng)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if generator is RecursiveDivision:
+            return RecursiveDivision.apply(grid, workers=workers, rng=rng)
+
+        rows, columns = grid.rows, grid.columns
+
+        # Tile in ordine di riga: (riga iniziale, colonna iniziale, righe, colonne)
+        tile_rows = -(-rows // tile_size)
+        tile_columns = -(-columns // tile_size)
+        tiles = [(tile_row * tile_size, tile_col * tile_size,
+                  min(tile_size, rows - tile_row * tile_size),
+                  min(tile_size, columns - tile_col * tile_size))
+                 for tile_row in range(tile_rows)
+                 for tile_col in range(tile_columns)]
+
+        # Ogni tile ha il proprio seed, altrimenti i processi
+        # partirebbero tutti dallo stesso stato casuale
+        seeds = [rng.getrandbits(64) for _ in tiles]
+
+        with grid._writable_walls(blank=True) as walls:
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(ParallelGenerator._generate_tile,
+                                       [generator] * len(tiles),
+                                       [tile[2] for tile in tiles],
+                                       [tile[3] for tile in tiles],
+                                       seeds)
+
+                # Copio ogni tile nella griglia, una riga del tile alla volta
+                for (row, col, height, width), tile_walls in zip(tiles, results):
+                    for i in range(height):
+                        start = (row + i) * columns + col
+                        walls[start:start + width] = tile_walls[i * width:(i + 1) * width]
+
+            ParallelGenerator._stitch(walls, columns, tiles, tile_rows, tile_columns, rng)
+
+        return grid
+    # ----------------------------------------------- #
+
+
+    # Genera un tile (rows x columns) con il generatore indicato.
+    # Eseguito in un processo separato: ritorna i bit di passaggio del tile.
+    @staticmethod
+    def _generate_tile(generator, rows, columns, seed):
+
+        tile = PackedGrid(rows, columns)
+        generator.apply(tile, rng=seed)
+
+        return tile._dump_walls()
+    # ----------------------------------------------- #
+
+
+    # Collega i tile con uno spanning tree casuale sul grafo dei tile (Kruskal):
+    # per ogni arco dell'albero apro un passaggio casuale sul bordo comune.
+    @staticmethod
+    def _stitch(walls, columns, tiles, tile_rows, tile_columns, rng):
+
+        # Archi tra tile adiacenti: (tile, tile a est, EAST) e (tile, tile a sud, SOUTH).
+        # La direzione è salvata nell'arco: con una sola colonna di tile
+        # anche il tile a sud è tile + 1.
+        edges = []
+        for tile_row in range(tile_rows):
+            for tile_col in range(tile_columns):
+                tile = tile_row * tile_columns + tile_col
+                if tile_col < tile_columns - 1:
+                    edges.append((tile, tile + 1, EAST))
+                if tile_row < tile_rows - 1:
+                    edges.append((tile, tile + tile_columns, SOUTH))
+
+        rng.shuffle(edges)
+
+        parent = list(range(len(tiles)))
+
+        def find(tile):
+            while parent[tile] != tile:
+                parent[tile] = parent[parent[tile]]
+                tile = parent[tile]
+            return tile
+
+        for tile, neighbor, direction in edges:
+
+            root, neighbor_root = find(tile), find(neighbor)
+            if root == neighbor_root:
+                continue
+            parent[neighbor_root] = root
+
+            row, col, height, width = tiles[tile]
+
+            if direction == EAST:
+                # Passaggio a est da una riga casuale dell'ultima colonna del tile
+                index = (row + rng.randrange(height)) * columns + col + width - 1
+                walls[index] |= EAST
+            else:
+                # Passaggio a sud da una colonna casuale dell'ultima riga del tile
+                index = (row + height - 1) * columns + col + rng.randrange(width)
+                walls[index] |= SOUTH
+    # ----------------------------------------------- #
@@ -1,4 +1,15 @@
-import random
+from array import array
+
+from cell import NORTH, SOUTH, EAST, WEST
+from rng import resolve
+
+
+# Tabella delle direzioni: per ogni maschera a 4 bit di celle adiacenti non visitate,
+# la tupla delle direzioni corrispondenti (nell'ordine nord, sud, est, ovest).
+_DIRECTIONS = tuple(
+    tuple(direction for direction in (NORTH, SOUTH, EAST, WEST) if mask & direction)
+    for mask in range(16)
+)
 
 
 # Algoritmo di generazione dei labirinti Recursive Backtracker,
@@ -7,42 +18,75 @@ import random
 # Sceglie una cella casuale iniziale, cerca tra le celle adiacenti e collega quelle
 # non visitate. Quando non ci sono celle adiacenti non visitate, l'algoritmo torna indietro
 # lungo il percorso fino a trovare una cella con vicini non visitati.
+#
+# Le celle sono indicate dal loro indice (row * columns + column):
+# le celle visitate sono segnate in un bytearray, lo stack è un array di interi
+# e i passaggi vengono scritti direttamente come bit EAST/SOUTH (vedi maze_file.py).
 class RecursiveBacktracker:
 
     @staticmethod
-    def apply(grid):
+    def apply(grid, rng=None):
+
+        rng = resolve(rng)
+        columns = grid.columns
+        size = grid.rows * columns
+
+        visited = bytearray(size)
 
         # Scegli cella casuale
-        cell = grid.random_cell()
+        cell = grid.random_cell(rng)
+        index = cell.row * columns + cell.column
 
         # Inizializzo stack delle celle da visitare
-        stack = []
-        stack.append(cell)
+        stack = array("i", [index])
+        visited[index] = 1
+
+        with grid._writable_walls() as walls:
+
+            while stack:
+
+                # Ottieni l'ultima cella nello stack senza rimuoverla
+                index = stack[-1]
+                row, column = divmod(index, columns)
 
-        while stack:
+                # Maschera delle celle adiacenti non ancora visitate
+                mask = 0
 
-            # Ottieni l'ultima cella nello stack senza rimuoverla
-            current_cell = stack[-1]
+                if row > 0 and not visited[index - columns]:
+                    mask |= NORTH
+                if index + columns < size and not visited[index + columns]:
+                    mask |= SOUTH
+                if column < columns - 1 and not visited[index + 1]:
+                    mask |= EAST
+                if column > 0 and not visited[index - 1]:
+                    mask |= WEST
 
-            # Cerca le celle adiacenti non ancora collegate
-            unlinked_neighbors = [
-                neighbor for neighbor in current_cell.all_neighbors()
-                if not neighbor.all_linked()
-            ]
+                # Se non ci sono celle adiacenti non visitate,
+                # rimuovi la cella in cima allo stack,
+                # ovvero la cella corrente
+                if not mask:
+                    stack.pop()
+                    continue
 
-            # Se non ci sono celle adiacenti non collegate,
-            # rimuovi la cella in cima allo stack,
-            # ovvero la cella corrente
-            if not unlinked_neighbors:
-                stack.pop()
-            else:
-                # Scelgo casualmente una cella adiacente
-                cell_neighbor = random.choice(unlinked_neighbors)
+                # Scelgo casualmente una direzione e collego la cella corrente
+                # alla cella adiacente in quella direzione
+                direction = rng.choice(_DIRECTIONS[mask])
 
-                # Collego la cella corrente alla cella adiacente scelta
-                current_cell.link(cell_neighbor)
+                if direction == NORTH:
+                    neighbor = index - columns
+                    walls[neighbor] |= SOUTH
+                elif direction == SOUTH:
+                    neighbor = index + columns
+                    walls[index] |= SOUTH
+                elif direction == EAST:
+                    neighbor = index + 1
+                    walls[index] |= EAST
+                else:
+                    neighbor = index - 1
+                    walls[neighbor] |= EAST
 
                 # Inserisco nello stack la cella adiacente
-                stack.append(cell_neighbor)
+                visited[neighbor] = 1
+                stack.append(neighbor)
 
-        return grid
\ No newline at end of file
+        return grid
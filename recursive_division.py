@@ -1,4 +1,12 @@
-import random
+from concurrent.futures import ProcessPoolExecutor
+
+from cell import EAST, SOUTH
+from rng import resolve
+
+
+# Tabelle di traduzione per chiudere in blocco i passaggi di una linea di celle
+_CLEAR_EAST = bytes(bits & ~EAST for bits in range(256))
+_CLEAR_SOUTH = bytes(bits & ~SOUTH for bits in range(256))
 
 
 # Algoritmo di generazione RecursiveDivision.
@@ -7,94 +15,152 @@ import random
 # Costruisce un muro lungo la linea di divisione scelta, scollegando ogni cella
 # da quella sud oppure est.
 # Lascia una cella casuale come passaggio, lasciando la cella collegata.
-# Effettua ricorsivamente gli step per le due nuove aree create.
+# Effettua gli step per le due nuove aree create.
+#
+# Il labirinto è costruito sui bit di passaggio EAST/SOUTH (vedi maze_file.py):
+# ogni muro è una slice di celle a cui viene tolto un bit, e le aree da dividere
+# sono tenute in uno stack esplicito invece che nella ricorsione.
 class RecursiveDivision:
 
-
+    # Se workers è indicato, le sotto-aree indipendenti vengono
+    # divise in parallelo da quel numero di processi.
     @staticmethod
-    def apply(grid):
+    def apply(grid, rng=None, *, workers=None):
+
+        rng = resolve(rng)
+        rows, columns = grid.rows, grid.columns
 
-        # Collega ogni cella con le adiacenti,
-        # creando una griglia completamente aperta.
-        for cell in grid.each_cell():
-            for neighbor in cell.all_neighbors():
-                cell.link(neighbor, bidirectional=False)
+        with grid._writable_walls(blank=True) as walls:
 
-        # Inizia divisione ricorsiva
-        RecursiveDivision._divide(grid, 0, 0, grid.rows, grid.columns)
+            # Collega ogni cella con le adiacenti,
+            # creando una griglia completamente aperta.
+            RecursiveDivision._open(walls, rows, columns)
+
+            # Inizia divisione
+            if workers:
+                RecursiveDivision._divide_parallel(walls, rows, columns, workers, rng)
+            else:
+                RecursiveDivision._divide(walls, columns, [(0, 0, rows, columns)], rng)
 
         return grid
+    # ----------------------------------------------- #
 
 
-    # Metodo interno per la divisione
+    # Apre tutti i passaggi interni di una griglia (rows x columns),
+    # una riga alla volta per non allocare una copia di tutta la griglia.
     @staticmethod
-    def _divide(grid, row, col, rows, columns):
+    def _open(walls, rows, columns):
 
-        # Non puoi dividere un area troppo piccola
-        if rows <= 1 or columns <= 1:
-            return
+        open_row = bytes([EAST | SOUTH]) * (columns - 1) + bytes([SOUTH])
+        last_row = bytes([EAST]) * (columns - 1) + bytes(1)
 
-        # Dividi orizzontalmente o verticalmente
-        if rows >= columns:
-            RecursiveDivision._divide_horizontal(grid, row, col, rows, columns)
-        else:
-            RecursiveDivision._divide_vertical(grid, row, col, rows, columns)
+        for row in range(rows):
+            start = row * columns
+            walls[start:start + columns] = open_row if row < rows - 1 else last_row
+    # ----------------------------------------------- #
 
 
-    # Metodo interno per dividere orizzontalmente
+    # Divide tutte le aree (row, col, rows, columns) nello stack chambers.
+    # width è il numero di colonne del buffer walls, rng la sorgente casuale.
+    # Se max_area è indicato, le aree con al più max_area celle non vengono divise
+    # ma ritornate, così da poterle dividere separatamente.
     @staticmethod
-    def _divide_horizontal(grid, row, col, rows, columns):
+    def _divide(walls, width, chambers, rng, max_area=None):
+
+        deferred = []
 
-        # Scegli riga casuale dove costruire il muro.
-        # Indica l'indice a NORD del muro
-        wall_south = random.randrange(rows - 1)
+        while chambers:
 
-        # Scegli colonna casuale dove scavare il passaggio nel muro
-        passage = random.randrange(columns)
+            row, col, rows, columns = chambers.pop()
 
-        # Itera lungo la linea scelta e crea il muro
-        for position in range(columns):
+            # Non puoi dividere un area troppo piccola
+            if rows <= 1 or columns <= 1:
+                continue
 
-            # Se ti trovi sul passaggio, ignora
-            if passage == position:
+            if max_area is not None and rows * columns <= max_area:
+                deferred.append((row, col, rows, columns))
                 continue
 
-            # Crea il muro rimuovendo i link tra celle
-            cell = grid[row + wall_south, col + position]
-            if cell and cell.south:
-                cell.unlink(cell.south)
+            # Dividi orizzontalmente o verticalmente.
+            # La seconda area viene inserita per prima nello stack, così le aree
+            # vengono divise nello stesso ordine della versione ricorsiva.
+            if rows >= columns:
+
+                # Scegli riga casuale dove costruire il muro (indice a NORD del muro)
+                # e colonna casuale dove scavare il passaggio nel muro
+                wall_south = rng.randrange(rows - 1)
+                passage = rng.randrange(columns)
 
+                # Crea il muro togliendo il bit SOUTH a tutta la linea, tranne al passaggio
+                start = (row + wall_south) * width + col
+                line = bytearray(bytes(walls[start:start + columns]).translate(_CLEAR_SOUTH))
+                line[passage] = walls[start + passage]
+                walls[start:start + columns] = line
 
-        # Ricorsione sulle nuove aree create
-        RecursiveDivision._divide(grid, row, col, wall_south + 1, columns)
-        RecursiveDivision._divide(grid, row + wall_south + 1, col, rows - wall_south - 1, columns)
+                chambers.append((row + wall_south + 1, col, rows - wall_south - 1, columns))
+                chambers.append((row, col, wall_south + 1, columns))
 
+            else:
 
+                # Scegli colonna casuale dove costruire il muro (indice a OVEST del muro)
+                # e riga casuale dove scavare il passaggio nel muro
+                wall_east = rng.randrange(columns - 1)
+                passage = rng.randrange(rows)
 
-    # Metodo interno per dividere verticalmente
+                # Crea il muro togliendo il bit EAST a tutta la colonna, tranne al passaggio
+                start = row * width + col + wall_east
+                stop = start + rows * width
+                line = bytearray(bytes(walls[start:stop:width]).translate(_CLEAR_EAST))
+                line[passage] = walls[start + passage * width]
+                walls[start:stop:width] = line
+
+                chambers.append((row, col + wall_east + 1, rows, columns - wall_east - 1))
+                chambers.append((row, col, rows, wall_east + 1))
+
+        return deferred
+    # ----------------------------------------------- #
+
+
+    # Divisione parallela: le prime divisioni vengono fatte qui,
+    # finché le aree sono abbastanza piccole da essere distribuite ai processi.
+    # Ogni area è indipendente dalle altre, quindi ogni processo la divide
+    # su un proprio buffer che viene poi ricopiato nella griglia.
     @staticmethod
-    def _divide_vertical(grid, row, col, rows, columns):
+    def _divide_parallel(walls, rows, columns, workers, rng):
 
-        # Scegli colonna casuale dove costruire il muro.
-        # Indica l'indice a OVEST del muro
-        wall_east = random.randrange(columns - 1)
+        max_area = max(1, (rows * columns) // (workers * 8))
+        chambers = RecursiveDivision._divide(walls, columns, [(0, 0, rows, columns)], rng, max_area)
 
-        # Scegli riga casuale dove scavare il passaggio nel muro
-        passage = random.randrange(rows)
+        # Ogni area ha il proprio seed, altrimenti i processi
+        # partirebbero tutti dallo stesso stato casuale
+        seeds = [rng.getrandbits(64) for _ in chambers]
 
-        # Itera lungo la linea scelta e crea il muro
-        for position in range(rows):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(RecursiveDivision._divide_chamber,
+                                   [chamber_rows for _, _, chamber_rows, _ in chambers],
+                                   [chamber_columns for _, _, _, chamber_columns in chambers],
+                                   seeds)
 
-            # Se ti trovi sul passaggio, ignora
-            if passage == position:
-                continue
+            for (row, col, chamber_rows, chamber_columns), local in zip(chambers, results):
+
+                # L'area locale ha tutti i bit aperti tranne i muri appena costruiti,
+                # mentre nella griglia l'area è ancora aperta tranne i muri di bordo:
+                # un AND riga per riga tiene entrambi.
+                for i in range(chamber_rows):
+                    start = (row + i) * columns + col
+                    local_row = local[i * chamber_columns:(i + 1) * chamber_columns]
+                    merged = int.from_bytes(walls[start:start + chamber_columns], "big") & int.from_bytes(local_row, "big")
+                    walls[start:start + chamber_columns] = merged.to_bytes(chamber_columns, "big")
+    # ----------------------------------------------- #
 
-            # Crea il muro rimuovendo i link tra celle
-            cell = grid[row + position, col + wall_east]
-            if cell and cell.east:
-                cell.unlink(cell.east)
 
+    # Divide un'area isolata di dimensione (rows x columns) con il seed indicato.
+    # Ritorna i bit di passaggio dell'area, con i bordi lasciati aperti.
+    @staticmethod
+    def _divide_chamber(rows, columns, seed):
+
+        walls = bytearray([EAST | SOUTH]) * (rows * columns)
+        RecursiveDivision._divide(walls, columns, [(0, 0, rows, columns)], resolve(seed))
 
-        # Ricorsione sulle nuove aree create
-        RecursiveDivision._divide(grid, row, col, rows, wall_east + 1)
-        RecursiveDivision._divide(grid, row, col + wall_east + 1, rows, columns - wall_east - 1)
\ No newline at end of file
+        return bytes(walls)
+    # ----------------------------------------------- #
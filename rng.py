@@ -0,0 +1,34 @@
+import hashlib
+import random
+
+
+# Sorgenti casuali riproducibili per generatori e analyzer.
+#
+# Ogni generatore accetta un parametro rng che può essere:
+#   None            usa il modulo random globale (comportamento di default)
+#   un intero       seed di un nuovo random.Random dedicato
+#   random.Random   (o qualsiasi oggetto con la stessa interfaccia) usato così com'è
+
+
+# Ritorna la sorgente casuale corrispondente a rng (vedi sopra)
+def resolve(rng=None):
+
+    if rng is None:
+        return random
+
+    if isinstance(rng, int):
+        return random.Random(rng)
+
+    return rng
+# ----------------------------------------------- #
+
+
+# Deriva count seed indipendenti da un unico seed principale,
+# sullo stile di SeedSequence.spawn: il seed i-esimo dipende solamente
+# da (seed, i), quindi ogni tentativo può essere rigenerato da solo,
+# in qualsiasi ordine e in qualsiasi processo.
+def spawn_seeds(seed, count):
+
+    return [int.from_bytes(hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=8).digest(), "little")
+            for i in range(count)]
+# ----------------------------------------------- #
@@ -1,4 +1,14 @@
-import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from cell import EAST, SOUTH
+from packed_grid import PackedGrid
+from rng import resolve
+
+
+# Tabella di traduzione per la versione su PackedGrid:
+# il lancio "1" continua il gruppo verso est, "0" lo chiude.
+_EAST_BITS = bytes(EAST if byte == ord("1") else 0 for byte in range(256))
 
 
 # Algoritmo di generazione dei labirinti Sidewinder.
@@ -9,8 +19,16 @@ import random
 # con la riga corrente, continuo per le altre righe.
 class Sidewinder:
 
+    # Se workers è indicato, su una PackedGrid le righe vengono
+    # generate in parallelo da quel numero di processi.
     @staticmethod
-    def apply(grid):
+    def apply(grid, rng=None, *, workers=None):
+
+        rng = resolve(rng)
+
+        # Su una griglia compatta uso la versione a blocchi
+        if isinstance(grid, PackedGrid):
+            return Sidewinder._apply_packed(grid, workers, rng)
 
         # Itera una riga per volta
         for row in grid.each_row():
@@ -36,13 +54,13 @@ class Sidewinder:
                 # (piuttosto che continuare ad aggiungere celle ad est),
                 # scegliamo una cella casuale del gruppo corrente,
                 # collegandola verso nord (questo per mantere l'algoritmo casuale)
-                is_group_closed = (east_edge or (not north_edge and random.randint(0,1) == 0)) # bool
+                is_group_closed = (east_edge or (not north_edge and rng.randint(0,1) == 0)) # bool
 
                 # Se non posso più aggiungere celle al gruppo
                 if is_group_closed:
 
                     # Seleziono causalmente una cella dal gruppo corrente
-                    new_cell = random.choice(group)
+                    new_cell = rng.choice(group)
 
                     # Taglio a nord di questa cella,
                     # ovvero collego la cella creando un passaggio.
@@ -56,4 +74,94 @@ class Sidewinder:
                 else:
                     cell.link(cell.east) # Altrimenti mi collego ad est, creando un passaggio
 
-        return grid
\ No newline at end of file
+        return grid
+
+
+    # Versione a blocchi per PackedGrid.
+    # Le righe sono indipendenti, a parte il taglio a nord che finisce nella riga sopra:
+    # ogni blocco di righe ritorna separatamente i tagli a est e quelli a nord,
+    # che vengono scritti nella griglia un blocco alla volta (vedi PackedGrid._load_row_blocks),
+    # quindi la memoria usata è quella di pochi blocchi anche su MappedGrid e TiledGrid.
+    @staticmethod
+    def _apply_packed(grid, workers, rng):
+
+        columns = grid.columns
+
+        if workers:
+            blocks = Sidewinder._carve_parallel(grid, workers, rng)
+        else:
+            blocks = (Sidewinder._carve_rows(columns, start, stop, rng)
+                      for start, stop in grid._row_blocks())
+
+        grid._load_row_blocks(blocks)
+
+        return grid
+    # ----------------------------------------------- #
+
+
+    # Genera i blocchi di righe su workers processi, in ordine di riga.
+    # Ogni blocco ha il proprio seed, altrimenti i processi
+    # partirebbero tutti dallo stesso stato casuale.
+    # In coda ci sono al più 2 * workers blocchi: quelli già calcolati
+    # aspettano di essere scritti senza accumularsi in memoria.
+    @staticmethod
+    def _carve_parallel(grid, workers, rng):
+
+        rows, columns = grid.rows, grid.columns
+
+        chunk = max(1, -(-rows // (workers * 4)))
+        chunk = min(chunk, max(1, (1 << 16) // columns))
+
+        bounds = [(start, min(rows, start + chunk)) for start in range(0, rows, chunk)]
+        seeds = [rng.getrandbits(64) for _ in bounds]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            pending = deque()
+
+            for (start, stop), seed in zip(bounds, seeds):
+
+                pending.append(executor.submit(Sidewinder._carve_rows, columns, start, stop, seed))
+
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+    # ----------------------------------------------- #
+
+
+    # Genera le righe [start, stop) di un labirinto largo columns.
+    # Ritorna due bytes in ordine di riga: i bit EAST di ogni cella
+    # e il bit SOUTH da scrivere nella cella sopra per ogni taglio a nord.
+    # rng è la sorgente casuale (vedi rng.py): un seed intero per i processi separati.
+    @staticmethod
+    def _carve_rows(columns, start, stop, rng=None):
+
+        rng = resolve(rng)
+        flips = []
+        north = bytearray((stop - start) * columns)
+
+        for row in range(start, stop):
+
+            # Riga nord: non posso tagliare a nord, il gruppo non si chiude mai
+            if row == 0:
+                flips.append("1" * (columns - 1) + "0")
+                continue
+
+            # Un lancio per cella, l'ultima cella chiude sempre il gruppo (bordo est)
+            row_flips = format(rng.getrandbits(columns), f"0{columns}b")[1:] + "0"
+            flips.append(row_flips)
+
+            # Ogni "0" chiude un gruppo: scelgo una cella a caso del gruppo e taglio a nord
+            offset = (row - start) * columns
+            group_start = 0
+
+            for group in row_flips.split("0")[:-1]:
+                group_size = len(group) + 1
+                north[offset + group_start + int(rng.random() * group_size)] = SOUTH
+                group_start += group_size
+
+        east = "".join(flips).encode().translate(_EAST_BITS)
+
+        return east, bytes(north)
@@ -0,0 +1,274 @@
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+from cell import EAST, SOUTH
+from grid import Grid
+from packed_grid import PackedGrid
+
+
+# Griglia compatta divisa in blocchi (tile) quadrati di tile_size x tile_size celle.
+# Ogni tile ha il proprio bytearray di bit di passaggio e può essere scaricato
+# su disco o ricaricato indipendentemente dagli altri.
+# In memoria restano al più max_tiles tile (cache LRU): gli altri vengono salvati
+# nella cartella directory e ricaricati al primo accesso.
+# I passaggi che attraversano il bordo tra due tile (EAST sull'ultima colonna del tile,
+# SOUTH sull'ultima riga del tile) non stanno nei tile ma in una piccola tabella a parte,
+# così ogni tile descrive solamente i passaggi interni.
+class TiledGrid(PackedGrid):
+
+    # Costruttore:
+    # se directory è None uso una cartella temporanea, eliminata da close()
+    # oppure (con weakref.finalize) quando la griglia viene eliminata o il programma termina,
+    # anche se close() non viene mai chiamata (per esempio con Grid.load).
+    def __init__(self, rows, columns, tile_size=256, max_tiles=64, directory=None):
+
+        self.tile_size = tile_size
+        self.max_tiles = max(1, max_tiles)
+
+        self._owns_directory = directory is None
+        self.directory = tempfile.mkdtemp(prefix="tiles_") if directory is None else directory
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._cleanup = None
+        if self._owns_directory:
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+        self._dirty = set()     # tile in memoria modificati dopo l'ultimo salvataggio
+        self._border = {}       # indice cella -> bit di passaggio tra tile diversi
+
+        super().__init__(rows, columns)
+    # ----------------------------------------------- #
+
+
+    # I tile in memoria, dal meno al più recentemente usato
+    def _create_grid(self):
+        return OrderedDict()
+    # ----------------------------------------------- #
+
+
+    # Percorso del file di un tile scaricato su disco
+    def _tile_path(self, key):
+        return os.path.join(self.directory, f"tile_{key[0]}_{key[1]}.bin")
+    # ----------------------------------------------- #
+
+
+    # Ritorna il tile (tile_row, tile_col), caricandolo da disco se necessario.
+    # Se la cache è piena, scarica il tile usato meno di recente.
+    def _tile(self, key):
+
+        tiles = self._grid
+        tile = tiles.get(key)
+
+        if tile is not None:
+            tiles.move_to_end(key)
+            return tile
+
+        path = self._tile_path(key)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                tile = bytearray(f.read())
+        else:
+            tile = bytearray(self.tile_size * self.tile_size)
+
+        tiles[key] = tile
+
+        if len(tiles) > self.max_tiles:
+            self._evict(next(iter(tiles)))
+
+        return tile
+    # ----------------------------------------------- #
+
+
+    # Scarica un tile dalla memoria, salvandolo su disco se modificato
+    def _evict(self, key):
+
+        tile = self._grid.pop(key)
+
+        if key in self._dirty:
+            with open(self._tile_path(key), "wb") as f:
+                f.write(tile)
+            self._dirty.discard(key)
+    # ----------------------------------------------- #
+
+
+    # Bit di passaggio che dalla cella (row, column) attraversano il bordo del tile
+    def _crossing(self, row, column):
+
+        last = self.tile_size - 1
+        crossing = 0
+
+        if column % self.tile_size == last:
+            crossing |= EAST
+
+        if row % self.tile_size == last:
+            crossing |= SOUTH
+
+        return crossing
+    # ----------------------------------------------- #
+
+
+    # Legge i bit di passaggio della cella di indice index
+    def _bits(self, index):
+
+        size = self.tile_size
+        row, column = divmod(index, self.columns)
+        tile = self._tile((row // size, column // size))
+
+        return tile[(row % size) * size + column % size] | self._border.get(index, 0)
+    # ----------------------------------------------- #
+
+
+    # Scrive i bit di passaggio della cella di indice index,
+    # separando i passaggi interni al tile da quelli verso i tile adiacenti.
+    def _set_bits(self, index, bits):
+
+        size = self.tile_size
+        row, column = divmod(index, self.columns)
+        key = (row // size, column // size)
+        crossing = self._crossing(row, column)
+
+        self._tile(key)[(row % size) * size + column % size] = bits & ~crossing
+        self._dirty.add(key)
+
+        if bits & crossing:
+            self._border[index] = bits & crossing
+        else:
+            self._border.pop(index, None)
+    # ----------------------------------------------- #
+
+
+    # Ritorna gli intervalli [start, stop) di righe e colonne coperti dal tile
+    def _tile_bounds(self, key):
+
+        size = self.tile_size
+        row_start, col_start = key[0] * size, key[1] * size
+
+        return (row_start, min(self.rows, row_start + size),
+                col_start, min(self.columns, col_start + size))
+    # ----------------------------------------------- #
+
+
+    # Ritorna tutti i tile della griglia in ordine di riga
+    def _tile_keys(self):
+
+        size = self.tile_size
+
+        for tile_row in range(-(-self.rows // size)):
+            for tile_col in range(-(-self.columns // size)):
+                yield tile_row, tile_col
+    # ----------------------------------------------- #
+
+
+    # Ricompone i bit di passaggio di tutta la griglia, un tile alla volta
+    def _dump_walls(self):
+
+        walls = bytearray(self.size())
+        size, columns = self.tile_size, self.columns
+
+        for key in self._tile_keys():
+
+            tile = self._tile(key)
+            row_start, row_stop, col_start, col_stop = self._tile_bounds(key)
+            width = col_stop - col_start
+
+            for row in range(row_start, row_stop):
+                start = (row - row_start) * size
+                index = row * columns + col_start
+                walls[index:index + width] = tile[start:start + width]
+
+        for index, bits in self._border.items():
+            walls[index] |= bits
+
+        return walls
+    # ----------------------------------------------- #
+
+
+    # Sostituisce i bit di passaggio di tutta la griglia, un tile alla volta
+    def _load_walls(self, walls):
+
+        self._border.clear()
+        self._load_rows(0, walls)
+    # ----------------------------------------------- #
+
+
+    # Sostituisce i bit di passaggio delle righe consecutive a partire da row,
+    # toccando solamente i tile che contengono quelle righe
+    def _load_rows(self, row, walls):
+
+        size, columns = self.tile_size, self.columns
+        stop = row + len(walls) // columns
+
+        for tile_row in range(row // size, -(-stop // size)):
+            for tile_col in range(-(-columns // size)):
+
+                key = (tile_row, tile_col)
+                tile = self._tile(key)
+                row_start, row_stop, col_start, col_stop = self._tile_bounds(key)
+                first, last = max(row, row_start), min(stop, row_stop)
+                width = col_stop - col_start
+
+                for current in range(first, last):
+                    start = (current - row_start) * size
+                    index = (current - row) * columns + col_start
+                    tile[start:start + width] = walls[index:index + width]
+
+                self._dirty.add(key)
+
+                # Sposto nella tabella di bordo i passaggi verso i tile adiacenti
+                for current in range(first, last):
+                    for column in range(col_start, col_stop):
+                        if self._crossing(current, column):
+                            self._set_bits(current * columns + column,
+                                           walls[(current - row) * columns + column])
+    # ----------------------------------------------- #
+
+
+    # I bit di passaggio sono divisi tra i tile, non c'è un buffer contiguo
+    def _walls_buffer(self):
+        return None
+    # ----------------------------------------------- #
+
+
+    # BFS per cella: quella di PackedGrid caricherebbe tutti i tile insieme
+    calc_distances = Grid.calc_distances
+    # ----------------------------------------------- #
+
+
+    # Ritorna il numero di tile attualmente in memoria
+    def resident_tiles(self):
+        return len(self._grid)
+    # ----------------------------------------------- #
+
+
+    # Salva su disco tutti i tile modificati (restano comunque in memoria)
+    def flush(self):
+
+        for key in list(self._dirty):
+            if key in self._grid:
+                with open(self._tile_path(key), "wb") as f:
+                    f.write(self._grid[key])
+                self._dirty.discard(key)
+    # ----------------------------------------------- #
+
+
+    # Libera la memoria; se la cartella dei tile è temporanea la elimina
+    def close(self):
+
+        self._grid.clear()
+        self._dirty.clear()
+
+        # Il finalizer elimina la cartella una sola volta
+        if self._cleanup is not None:
+            self._cleanup()
+    # ----------------------------------------------- #
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    # ----------------------------------------------- #
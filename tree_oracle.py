@@ -0,0 +1,170 @@
+from array import array
+
+
+# Oracolo dei cammini minimi per labirinti perfetti.
+# Ogni labirinto generato è un albero di copertura: il cammino tra due celle è unico
+# e passa per il loro antenato comune più basso (LCA) rispetto ad una root.
+# Il costruttore visita il labirinto una sola volta, salva padre e profondità
+# di ogni cella (per indice row * columns + column) e costruisce le tabelle
+# di binary lifting: up[k][i] è l'antenato 2^k livelli sopra la cella i.
+# Dopo la costruzione:
+#   - distance(a, b) costa O(log n)
+#   - path(a, b) costa O(log n + lunghezza del cammino)
+# invece di una ricerca A* completa per ogni coppia di celle.
+class TreePathOracle:
+
+    def __init__(self, grid, root=None):
+
+        if root is None:
+            root = grid[0, 0]
+
+        self.grid = grid
+        self.root = root
+
+        size = grid.size()
+        columns = grid.columns
+        root_index = root.row * columns + root.column
+
+        # -1 indica una cella non raggiungibile dalla root
+        parent = array("i", [-1]) * size
+        depth = array("i", [-1]) * size
+
+        parent[root_index] = root_index
+        depth[root_index] = 0
+        frontier = [root_index]
+
+        # BFS per livelli sugli indici
+        while frontier:
+
+            next_frontier = []
+
+            for index in frontier:
+
+                next_depth = depth[index] + 1
+
+                for linked in grid._linked_indices(index):
+
+                    if depth[linked] < 0:
+                        parent[linked] = index
+                        depth[linked] = next_depth
+                        next_frontier.append(linked)
+
+                    # Una cella già visitata che non è il padre chiude un ciclo
+                    elif linked != parent[index] and parent[linked] != index:
+                        raise ValueError(f"Il labirinto contiene cicli: "
+                                         f"{grid._cell(index)} - {grid._cell(linked)}")
+
+            frontier = next_frontier
+
+        # Le celle non raggiunte puntano a sé stesse, così i salti restano nell'array
+        for index in range(size):
+            if parent[index] < 0:
+                parent[index] = index
+
+        # Tabelle di binary lifting: livello k ricavato dal livello k - 1
+        up = [parent]
+        for _ in range(max(depth).bit_length() - 1):
+            previous = up[-1]
+            up.append(array("i", [previous[ancestor] for ancestor in previous]))
+
+        self._parent = parent
+        self._depth = depth
+        self._up = up
+    # ----------------------------------------------- #
+
+
+    # Indice della cella nella griglia
+    def _index(self, cell):
+        return cell.row * self.grid.columns + cell.column
+    # ----------------------------------------------- #
+
+
+    # Indice dell'antenato comune più basso tra gli indici a e b
+    # (entrambi raggiungibili dalla root).
+    def _lca_index(self, a, b):
+
+        depth = self._depth
+        up = self._up
+
+        if depth[a] < depth[b]:
+            a, b = b, a
+
+        # Porto a alla stessa profondità di b saltando per potenze di due
+        difference = depth[a] - depth[b]
+        level = 0
+        while difference:
+            if difference & 1:
+                a = up[level][a]
+            difference >>= 1
+            level += 1
+
+        if a == b:
+            return a
+
+        # Risalgo insieme finché gli antenati sono diversi
+        for level in range(len(up) - 1, -1, -1):
+            if up[level][a] != up[level][b]:
+                a = up[level][a]
+                b = up[level][b]
+
+        return self._parent[a]
+    # ----------------------------------------------- #
+
+
+    # Ritorna l'antenato comune più basso tra due celle,
+    # oppure None se una delle due non è raggiungibile dalla root.
+    def lca(self, cell, another_cell):
+
+        a, b = self._index(cell), self._index(another_cell)
+
+        if self._depth[a] < 0 or self._depth[b] < 0:
+            return None
+
+        return self.grid._cell(self._lca_index(a, b))
+    # ----------------------------------------------- #
+
+
+    # Ritorna la distanza (numero di passi) tra due celle,
+    # oppure None se non sono collegate.
+    def distance(self, cell, another_cell):
+
+        a, b = self._index(cell), self._index(another_cell)
+        depth = self._depth
+
+        if depth[a] < 0 or depth[b] < 0:
+            return None
+
+        return depth[a] + depth[b] - 2 * depth[self._lca_index(a, b)]
+    # ----------------------------------------------- #
+
+
+    # Ritorna il cammino (lista di celle) da cell ad another_cell, estremi compresi,
+    # oppure una lista vuota se non sono collegate (come AStar.apply).
+    def path(self, cell, another_cell):
+
+        a, b = self._index(cell), self._index(another_cell)
+        depth = self._depth
+        parent = self._parent
+
+        if depth[a] < 0 or depth[b] < 0:
+            return []
+
+        ancestor = self._lca_index(a, b)
+
+        # Salgo da entrambe le celle fino all'antenato comune
+        forward = []
+        while a != ancestor:
+            forward.append(a)
+            a = parent[a]
+
+        backward = []
+        while b != ancestor:
+            backward.append(b)
+            b = parent[b]
+
+        forward.append(ancestor)
+        forward.extend(reversed(backward))
+
+        cell_at = self.grid._cell
+        return [cell_at(index) for index in forward]
+    # ----------------------------------------------- #
@@ -0,0 +1,64 @@
+from rng import resolve
+
+
+# Algoritmo di generazione di Wilson (loop-erased random walk).
+# Come Aldous-Broder genera un labirinto scelto uniformemente tra tutti
+# i possibili spanning tree della griglia, ma è molto più veloce:
+# invece di vagare finché tutte le celle sono state visitate, parte da ogni cella
+# non ancora nel labirinto e cammina a caso finché non incontra il labirinto,
+# cancellando i cicli del percorso; il percorso senza cicli viene poi scavato.
+class Wilson:
+
+    @staticmethod
+    def apply(grid, rng=None):
+
+        rng = resolve(rng)
+
+        # Tutte le celle sono fuori dal labirinto,
+        # tranne una cella casuale che fa da punto di arrivo per la prima passeggiata
+        unvisited = set(grid.each_cell())
+        unvisited.remove(grid.random_cell(rng))
+
+        Wilson._loop_erased_walks(grid, unvisited, rng)
+
+        return grid
+    # ----------------------------------------------- #
+
+
+    # Aggiunge al labirinto tutte le celle ancora in unvisited.
+    # L'ordine delle celle di partenza non influisce sull'uniformità,
+    # quindi le prendo semplicemente nell'ordine della griglia.
+    #
+    # Nota: far partire Wilson da un albero parziale costruito da Aldous-Broder
+    # (variante ibrida) NON mantiene l'uniformità: su una griglia 2x3 alcuni
+    # dei 15 spanning tree escono fino al 25% più spesso degli altri.
+    @staticmethod
+    def _loop_erased_walks(grid, unvisited, rng):
+
+        # Per ogni cella della passeggiata, l'ultima direzione presa.
+        # Sovrascrivere la direzione quando si ripassa da una cella
+        # equivale a cancellare il ciclo appena percorso.
+        next_cell = {}
+
+        for start in grid.each_cell():
+
+            if start not in unvisited:
+                continue
+
+            # Cammino a caso finché non raggiungo il labirinto
+            cell = start
+            while cell in unvisited:
+                neighbor = rng.choice(cell.all_neighbors())
+                next_cell[cell] = neighbor
+                cell = neighbor
+
+            # Ripercorro il cammino senza cicli e lo scavo
+            cell = start
+            while cell in unvisited:
+                neighbor = next_cell[cell]
+                cell.link(neighbor)
+                unvisited.remove(cell)
+                cell = neighbor
+
+            next_cell.clear()
+    # ----------------------------------------------- #